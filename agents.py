@@ -0,0 +1,275 @@
+import os
+import json
+import time
+import httpx
+import threading
+from urllib.parse import urlparse
+from openai import OpenAI, APIError
+from openai.types import CompletionUsage
+from context import ContextManager, count_messages
+from telemetry import Telemetry
+from providers import get_provider
+
+# 共享的大模型客户端：按 (服务地址, API key) 复用，同一服务商的多个智能体以及同一进程中的全部比赛共用一个长连接池
+# 避免每局为每位玩家新建客户端，重复进行 TCP/TLS 握手
+CLIENT_SETTINGS = {
+    # 每个客户端的最大连接数与保持的空闲长连接数
+    "max_connections": 20,
+    "max_keepalive": 10,
+    # 读取超时（两次收到数据的最长间隔）与建立连接超时（秒），超时后由服务商调度器重试
+    "timeout": 180,
+    "connect_timeout": 10,
+}
+_clients = {}
+_clients_lock = threading.Lock()
+# 创建客户端的进程，子进程（fork）不能沿用父进程的连接
+_clients_pid = os.getpid()
+
+# 修改客户端设置，之后新建的客户端生效
+def configure_clients(**settings):
+    CLIENT_SETTINGS.update({key: value for key, value in settings.items() if value is not None})
+
+def shared_client(api_key, base_url):
+    global _clients_pid
+    key = (base_url, api_key)
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+        client = _clients.get(key)
+        if client is None:
+            timeout = httpx.Timeout(CLIENT_SETTINGS["timeout"], connect=CLIENT_SETTINGS["connect_timeout"])
+            client = OpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                timeout=timeout,
+                # 重试由服务商调度器负责（退避加抖动，并计入限速），客户端不再自行重试
+                max_retries=0,
+                http_client=httpx.Client(
+                    limits=httpx.Limits(max_connections=CLIENT_SETTINGS["max_connections"], max_keepalive_connections=CLIENT_SETTINGS["max_keepalive"]),
+                    timeout=timeout
+                )
+            )
+            _clients[key] = client
+        return client
+
+# 关闭全部共享客户端
+def close_clients():
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+# 读取响应中的用量信息，缓存命中的字段因服务商而异
+# OpenAI/千问/豆包/Kimi 为 prompt_tokens_details.cached_tokens，DeepSeek 为 prompt_cache_hit_tokens
+def read_usage(usage):
+    if usage is None:
+        return {"prompt_tokens": None, "completion_tokens": None, "cached_tokens": None}
+    cached = getattr(usage, "prompt_cache_hit_tokens", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    if cached is None and details is not None:
+        cached = getattr(details, "cached_tokens", None)
+    if cached is None:
+        cached = getattr(usage, "cached_tokens", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "cached_tokens": cached
+    }
+
+# 简短的决策请求（只需回答编号等），可进行对冲请求
+DECISION_PHASES = {"seer", "wolf_vote", "witch", "guard", "hunter", "vote"}
+
+# 按阶段汇总用量记录
+def summarize_usage(records):
+    summary = {}
+    for record in records:
+        row = summary.setdefault(record["phase"], {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0, "latency": 0.0, "prefix_breaks": 0})
+        row["calls"] += 1
+        row["prompt_tokens"] += record["prompt_tokens"] or 0
+        row["cached_tokens"] += record["cached_tokens"] or 0
+        row["completion_tokens"] += record["completion_tokens"] or 0
+        row["latency"] += record["latency"]
+        row["prefix_breaks"] += not record["prefix_stable"]
+    return summary
+
+# 设置大模型智能体类
+# 请求消息的排列保证前缀稳定：系统提示词在最前，之后的历史只追加不修改（事件块由只追加的事件库渲染，内容不变），
+# 仅在压缩上下文时前缀改变一次，以便服务商的前缀缓存命中
+class Agents:
+    # store 为共享的游戏事件库，seat 为该智能体的玩家编号；事件在 chat 时才按可见范围读取并合并进 history
+    # recorder 记录每次请求与回答；replayer 不为 None 时从记录中取回答，不再请求大模型；telemetry 记录每次请求的追踪和指标
+    def __init__(self, api_key, base_url, model, role_prompt, budget=None, store=None, seat=None, recorder=None, replayer=None, telemetry=None):
+        # 传入 API URL model 和基本设置，使用共享的客户端，回放时无需客户端
+        self.client = shared_client(api_key, base_url) if replayer is None else None
+        self.recorder = recorder
+        self.replayer = replayer
+        self.telemetry = telemetry or Telemetry()
+        # 服务商（取服务地址的主机名）与身份，仅用于追踪和指标
+        self.provider = urlparse(base_url).hostname
+        # 服务商调度器：限速、限制并发、重试和对冲请求，同一服务商的全部智能体共用
+        self.scheduler = get_provider(base_url)
+        self.role = None
+        self.role_prompt = role_prompt
+        # history 中事件块仅记录事件序号 {"role": "user", "events": [...]}，文本只在事件库中存一份，请求时再展开
+        self.history = [{"role": "system", "content": role_prompt}]
+        self.model = model
+        self.store = store
+        self.seat = seat
+        self.cursor = 0
+        # 上下文管理，budget 为每次请求的令牌预算，None 表示不限制
+        self.context = ContextManager(budget)
+        self.context.render = self.render
+        # 每次请求的用量与耗时记录，以及上一次请求各条消息的哈希（用于校验前缀是否稳定）
+        self.usage = []
+        self.prefix = []
+
+    # 展开一条 history 记录为请求消息
+    def render(self, message):
+        if "events" in message:
+            return {"role": "user", "content": self.store.render(message["events"])}
+        return message
+
+    # 读取事件库中新的可见事件，连续的事件合并为一条消息
+    def sync(self):
+        if self.store is None:
+            return
+        seqs, self.cursor = self.store.pending(self.seat, self.cursor)
+        if seqs:
+            self.history.append({"role": "user", "events": seqs})
+            for seq in seqs:
+                if self.store.events[seq]["pinned"]:
+                    self.context.pin(self.store.events[seq]["text"])
+
+    # 标记新一天的开始，压缩时以天为单位
+    def new_day(self, day):
+        self.sync()
+        self.context.mark_day(day, self.history)
+
+    # 定义 chat 函数，根据指令和历史全部信息进行对话
+    # 传入 on_text 时使用流式输出，每收到一段文本即回调 on_text，最终仍返回完整回答
+    # phase 为当前游戏阶段，仅用于用量统计；options 为额外的请求参数（如 JSON 模式）
+    def chat(self, query, on_text=None, phase=None, options=None):
+        self.sync()
+        self.history.append({"role": "user", "content": query})
+        # 超出令牌预算时压缩之前的历史
+        self.history = self.context.fit(self.history)
+        messages = [self.render(message) for message in self.history]
+        prefix_stable = self.check_prefix(messages)
+        answer = self.call(messages, query, on_text, phase, prefix_stable, self.context.stats["last_tokens"], options)
+        # 所有历史对话信息存入 self.history
+        self.history.append({"role": "assistant","content": answer})
+        return answer
+
+    # 定义 decide 函数，用于查验、投票、用药、开枪等只需简短回答的决策
+    # 只发送系统提示词和引擎生成的局势摘要 summary，限制输出长度，问答不计入 history（决策结果由引擎以事件告知）
+    # max_tokens 为 None 时不限制（推理模型的思考过程也计入输出长度）
+    def decide(self, query, summary, phase=None, max_tokens=16, options=None):
+        messages = [{"role": "system", "content": self.role_prompt}, {"role": "user", "content": summary + "\n" + query}]
+        options = {"temperature": 0.3, **(options or {})}
+        if max_tokens:
+            options["max_tokens"] = max_tokens
+        return self.call(messages, query, None, phase, True, count_messages(messages), options)
+
+    # 请求一次回答并记录追踪、回放记录和用量，options 为额外的请求参数
+    def call(self, messages, query, on_text, phase, prefix_stable, context_tokens, options=None):
+        options = {"temperature": 0.9, **(options or {})}
+        start = time.perf_counter()
+        with self.telemetry.span("chat", model=self.model, provider=self.provider, seat=self.seat, role=self.role, phase=phase or "other", day=self.store.day if self.store else None) as span:
+            if self.replayer is not None:
+                answer, usage, first = self.replayer.replay(self.seat, query, on_text), None, None
+            else:
+                answer, usage, first, retries, hedged = self.request(messages, on_text, start, phase in DECISION_PHASES, options)
+                span.update(retries=retries, hedged=hedged)
+            tokens = read_usage(usage)
+            span.update(tokens, messages=len(messages), context_tokens=context_tokens, first_token=first, prefix_stable=prefix_stable)
+        latency = time.perf_counter() - start
+        if self.recorder is not None:
+            self.recorder.write("chat", seat=self.seat, phase=phase, query=query, answer=answer, latency=latency)
+        self.usage.append({
+            "phase": phase or "other",
+            "day": self.store.day if self.store else None,
+            "model": self.model,
+            # 本地估算的请求令牌数（服务商未返回用量时仍可用）
+            "context_tokens": context_tokens,
+            "messages": len(messages),
+            "latency": latency,
+            "first_token": first,
+            "prefix_stable": prefix_stable,
+            **tokens
+        })
+        return answer
+
+    # 通过服务商调度器请求大模型，返回 (回答, 用量, 首个令牌耗时, 重试次数, 是否发出了对冲请求)
+    # decision 为 True 的非流式请求可进行对冲；流式请求已推送部分文本后出错不再重试，以免重复发言
+    def request(self, messages, on_text, start, decision=False, options=None):
+        options = options or {"temperature": 0.9}
+        if on_text is None:
+            (answer, usage), retries, hedged = self.scheduler.call(lambda: self.complete(messages, options), hedge=decision, model=self.model)
+            return answer, usage, None, retries, hedged
+        parts = []
+        (usage, first), retries, hedged = self.scheduler.call(lambda: self.stream(messages, on_text, start, parts, options), can_retry=lambda: not parts)
+        return "".join(parts), usage, first, retries, hedged
+
+    # 一次非流式请求，返回 (回答, 用量)
+    def complete(self, messages, options):
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages= messages,
+            stream=False,
+            **options
+        )
+        return response.choices[0].message.content or "", response.usage
+
+    # 一次流式请求，文本片段追加到 parts，返回 (用量, 首个令牌耗时)
+    def stream(self, messages, on_text, start, parts, options):
+        usage = None
+        first = None
+        # 自行读取完整的 SSE 响应（SDK 读到 [DONE] 即关闭响应，连接无法放回连接池复用）
+        with self.client.chat.completions.with_streaming_response.create(
+            model=self.model,
+            messages= messages,
+            stream=True,
+            # 流式输出时请求在最后一个数据块中返回用量
+            stream_options={"include_usage": True},
+            **options
+        ) as response:
+            for line in response.iter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    continue
+                chunk = json.loads(data)
+                if chunk.get("error"):
+                    raise APIError(str(chunk["error"].get("message", chunk["error"])), request=response.http_request, body=chunk["error"])
+                if chunk.get("usage"):
+                    usage = CompletionUsage.model_validate(chunk["usage"])
+                if not chunk.get("choices"):
+                    continue
+                # 推理模型的思考过程(reasoning_content)不计入回答
+                delta = chunk["choices"][0].get("delta", {}).get("content")
+                if delta:
+                    if first is None:
+                        first = time.perf_counter() - start
+                    parts.append(delta)
+                    on_text(delta)
+        return usage, first
+
+    # 保存与恢复对话状态（history 中的事件块只有序号，需同时恢复事件库），用于断点续跑
+    def state(self):
+        return {"history": self.history, "cursor": self.cursor, "context": self.context.state(self.history), "usage": self.usage}
+
+    def load_state(self, state):
+        self.history = state["history"]
+        self.cursor = state["cursor"]
+        self.usage = state["usage"]
+        self.context.load_state(state["context"], self.history)
+        self.prefix = []
+
+    # 校验本次请求是否为上一次请求的追加（前缀不变），并记录本次请求的消息哈希
+    def check_prefix(self, messages):
+        prefix = [hash((message["role"], message["content"])) for message in messages]
+        stable = prefix[:len(self.prefix)] == self.prefix
+        self.prefix = prefix
+        return stable
@@ -0,0 +1,61 @@
+import re
+import json
+
+# 大模型回答的解析与合法性校验
+# 解析函数返回 (结果, 错误说明)，回答合法时错误说明为 None，否则结果为 None，错误说明用于重新提问
+
+# 支持 JSON 模式时附加在提问后的格式要求（与提问在同一行）
+JSON_SPEC = '请以JSON格式回复：{"answer": "你的回答"}'
+
+# 中文数字编号，例如“三号”
+NUMERALS = {"一": 1, "二": 2, "两": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9, "十": 10, "十一": 11, "十二": 12}
+
+# 取出 JSON 模式回答中的 answer 字段，不是 JSON 时原样返回
+def unwrap(text):
+    text = (text or "").strip()
+    match = re.search(r"\{.*\}", text, re.S)
+    if match:
+        try:
+            value = json.loads(match.group(0))
+        except ValueError:
+            return text
+        if isinstance(value, dict) and "answer" in value:
+            return str(value["answer"]).strip()
+    return text
+
+# 回答中按出现顺序的全部玩家编号（阿拉伯数字，或后接“号”的中文数字）
+def numbers(text):
+    found = []
+    for match in re.finditer(r"(\d+)|([一二两三四五六七八九十]+)号", text):
+        if match.group(1):
+            found.append(int(match.group(1)))
+        elif match.group(2) in NUMERALS:
+            found.append(NUMERALS[match.group(2)])
+    return found
+
+def listing(ids):
+    return "、".join(map(str, ids)) + "号" if ids else "无"
+
+# 解析单个选择：legal 为合法的目标编号，options 为可选的文字回答（如 弃票、不用、救/不救）
+# 回答中出现合法编号时取第一个，否则取出现的文字选项（较长的优先，“不救”不会被当作“救”）
+def parse_choice(text, legal, options = ()):
+    text = unwrap(text)
+    ids = numbers(text)
+    for id in ids:
+        if id in legal:
+            return id, None
+    for option in sorted(options, key=len, reverse=True):
+        if option in text:
+            return option, None
+    allowed = [listing(legal)] if legal else []
+    allowed += [f"“{option}”" for option in options]
+    if ids:
+        return None, f"{listing(ids)}玩家不是可选的目标，只能回答：{'或'.join(allowed)}"
+    return None, f"无法从回答中识别出选择，只能回答：{'或'.join(allowed)}"
+
+# 解析 MVP 与战犯投票 'x-y'：取前两个合法编号，两者须不同
+def parse_pair(text, legal):
+    ids = [id for id in numbers(unwrap(text)) if id in legal]
+    if len(ids) >= 2 and ids[0] != ids[1]:
+        return (ids[0], ids[1]), None
+    return None, f"请严格按照'x-y'的格式回答两个不同的玩家编号，编号只能是{listing(legal)}"
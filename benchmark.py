@@ -0,0 +1,191 @@
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import tracemalloc
+from agents import summarize_usage
+from mock_server import MockServer
+from engine import WerewolfEngine, EXAMPLE_AGENTS, BOARDS, with_base_url, narrator_lines
+
+# 基准测试：对本地模拟服务（或指定服务）进行若干局游戏，统计每小时局数、各阶段耗时、每天的提示词长度、
+# 智能体历史的内存占用，可选统计语音合成耗时和界面每批事件的处理耗时，结果以 JSON 输出便于不同版本对比
+
+# 分位数
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def describe(values):
+    return {
+        "count": len(values),
+        "total": sum(values),
+        "mean": sum(values) / len(values) if values else None,
+        "p50": percentile(values, 0.5),
+        "p95": percentile(values, 0.95),
+        "max": max(values) if values else None
+    }
+
+# 无界面运行若干局，统计引擎性能，board 为板子（身份组成），用于比较不同人数下的耗时和上下文增长
+def bench_engine(games, base_url, max_workers, stream, context_budget, compact_decisions=True, board=None):
+    engine = WerewolfEngine(matchs=games, agents=with_base_url(EXAMPLE_AGENTS, base_url), max_workers=max_workers, stream=stream, context_budget=context_budget, compact_decisions=compact_decisions, board=board)
+    records = []
+    history_bytes = []
+
+    # 每局结束时收集用量记录和历史大小（下一局开始时会被重置）
+    def listener(event):
+        if event[0] == "game_result":
+            records.extend(record for player in engine.players for record in player["Agent"].usage)
+            size = len(json.dumps(engine.store.state(), ensure_ascii=False).encode("utf-8"))
+            size += sum(len(json.dumps(player["Agent"].history, ensure_ascii=False).encode("utf-8")) for player in engine.players)
+            history_bytes.append(size)
+    engine.listener = listener
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    engine.run()
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    phases = {}
+    for timing in engine.timings:
+        phases.setdefault(timing["phase"], []).append(timing["seconds"])
+    days = {}
+    for record in records:
+        row = days.setdefault(record["day"], {"calls": 0, "context_tokens": [], "prompt_tokens": []})
+        row["calls"] += 1
+        row["context_tokens"].append(record["context_tokens"])
+        if record["prompt_tokens"] is not None:
+            row["prompt_tokens"].append(record["prompt_tokens"])
+    return {
+        "games": games,
+        "wall_seconds": wall,
+        "games_per_hour": games * 3600 / wall if wall else None,
+        "phases": {phase: describe(values) for phase, values in phases.items()},
+        "prompt_tokens_by_day": {str(day): {
+            "calls": row["calls"],
+            "mean_context_tokens": sum(row["context_tokens"]) / row["calls"],
+            "max_context_tokens": max(row["context_tokens"]),
+            "mean_prompt_tokens": sum(row["prompt_tokens"]) / len(row["prompt_tokens"]) if row["prompt_tokens"] else None
+        } for day, row in sorted(days.items(), key=lambda x: x[0] or 0)},
+        "memory": {
+            "peak_mb": peak / 1024 / 1024,
+            "history_kb": describe([size / 1024 for size in history_bytes])
+        },
+        "usage": summarize_usage(records)
+    }
+
+# 语音合成耗时：玩家音色不使用缓存，逐条合成；上帝音色统计磁盘缓存命中时的耗时
+def bench_tts(count):
+    from speech import TextToSpeech, AudioCache
+    try:
+        voice = TextToSpeech(cache = AudioCache(tempfile.mkdtemp()))
+    except Exception as e:
+        return {"error": str(e)}
+    texts = narrator_lines()[:count]
+
+    def synthesize(text, id):
+        start = time.perf_counter()
+        audio = asyncio.run_coroutine_threadsafe(voice.synthesize(text, id), voice.loop).result()
+        return time.perf_counter() - start, audio
+
+    cold = []
+    failed = 0
+    for text in texts:
+        seconds, audio = synthesize(text, 1)
+        if audio:
+            cold.append(seconds)
+        else:
+            failed += 1
+    # 先写入缓存，再统计命中耗时
+    voice.prewarm(texts).result()
+    cached = [synthesize(text, 0)[0] for text in texts]
+    return {"synthesis": describe(cold), "cached": describe(cached), "failed": failed}
+
+# 界面耗时：运行 Tk 界面（不进行语音播报），统计每批事件的处理耗时
+def bench_ui(games, base_url, max_workers, board=None):
+    import tkinter as tk
+    try:
+        from main import WerewolfGame
+        game = WerewolfGame(voice = False)
+    except tk.TclError as e:
+        return {"error": str(e)}
+    game.engine = WerewolfEngine(matchs=games, agents=with_base_url(EXAMPLE_AGENTS, base_url), max_workers=max_workers, stream=True, board=board)
+    game.start_game()
+
+    # 最后一局结束后退出主循环
+    def check():
+        if game.engine.match == games and not game.engine.in_game:
+            game.root.quit()
+        else:
+            game.root.after(200, check)
+    game.root.after(200, check)
+    game.root.mainloop()
+    game.root.destroy()
+    return {
+        "batches": len(game.frame_times),
+        "events": sum(frame["events"] for frame in game.frame_times),
+        "ms": describe([frame["seconds"] * 1000 for frame in game.frame_times])
+    }
+
+# 与之前的结果对比主要指标
+def compare(old, new):
+    def line(name, a, b):
+        if a is None or b is None:
+            return
+        change = (b - a) / a if a else 0
+        print(f"{name} : {a:.3f} -> {b:.3f} ({change:+.1%})")
+    line("每小时局数", old["engine"]["games_per_hour"], new["engine"]["games_per_hour"])
+    for phase, row in new["engine"]["phases"].items():
+        if phase in old["engine"]["phases"]:
+            line(f"{phase} 平均耗时", old["engine"]["phases"][phase]["mean"], row["mean"])
+    line("内存峰值(MB)", old["engine"]["memory"]["peak_mb"], new["engine"]["memory"]["peak_mb"])
+    if old.get("ui") and new.get("ui") and "ms" in old["ui"] and "ms" in new["ui"]:
+        line("界面处理耗时 p95(ms)", old["ui"]["ms"]["p95"], new["ui"]["ms"]["p95"])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI狼人杀基准测试")
+    parser.add_argument("-n", "--games", type=int, default=5, help="游戏局数")
+    parser.add_argument("-w", "--workers", type=int, default=9, help="并发决策数")
+    parser.add_argument("--stream", action="store_true", help="玩家发言流式生成")
+    parser.add_argument("--board", default="9人预女猎", choices=list(BOARDS), help="板子（身份组成）")
+    parser.add_argument("--context-budget", type=int, default=None, help="每个智能体的上下文令牌预算")
+    parser.add_argument("--full-decisions", action="store_true", help="决策也发送完整对话历史（默认只发送局势摘要）")
+    parser.add_argument("--base-url", default=None, help="大模型服务地址，默认在本进程内启动模拟服务")
+    parser.add_argument("--scale", type=float, default=0.05, help="模拟服务的延迟缩放比例")
+    parser.add_argument("--seed", type=int, default=0, help="模拟服务的随机种子")
+    parser.add_argument("--faults", action="store_true", help="模拟服务按各模型的设置注入错误和超时，默认不注入以便结果可比")
+    parser.add_argument("--tts", type=int, default=0, help="统计语音合成耗时的文本条数（需要网络），0 为不统计")
+    parser.add_argument("--ui", type=int, default=0, help="统计界面耗时的游戏局数（需要显示器），0 为不统计")
+    parser.add_argument("-o", "--output", default=None, help="结果 JSON 文件")
+    parser.add_argument("--compare", default=None, help="与之前的结果 JSON 文件对比")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        faults = None if args.faults else 0
+        server = MockServer(scale=args.scale, error_rate=faults, timeout_rate=faults, seed=args.seed).start()
+        base_url = server.url
+
+    result = {
+        "config": {"games": args.games, "workers": args.workers, "stream": args.stream, "context_budget": args.context_budget, "full_decisions": args.full_decisions, "base_url": args.base_url, "scale": args.scale, "seed": args.seed, "faults": args.faults, "board": args.board},
+        "engine": bench_engine(args.games, base_url, args.workers, args.stream, args.context_budget, not args.full_decisions, BOARDS[args.board]),
+        "tts": bench_tts(args.tts) if args.tts else None,
+        "ui": bench_ui(args.ui, base_url, args.workers, BOARDS[args.board]) if args.ui else None
+    }
+    if server:
+        server.stop()
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), result)
@@ -0,0 +1,133 @@
+import re
+
+# 令牌计数：安装了 tiktoken 时精确计数，否则按字符估算（中文约1字1令牌，其余约4个字符1令牌）
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+def count_tokens(text):
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    cjk = len(re.findall(r"[\u3000-\u9fff\uff00-\uffef]", text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+# 每条消息额外约4个令牌的格式开销
+def count_messages(messages):
+    return sum(count_tokens(message["content"]) + 4 for message in messages)
+
+# 默认摘要方式：不调用大模型，逐条压缩
+# 死亡、投票等短消息原样保留，长发言截取开头，自己的回答标注为“我”
+def compact_lines(messages, limit = 60):
+    lines = []
+    for message in messages:
+        text = " ".join(message["content"].split())
+        if len(text) > limit:
+            text = text[:limit] + "……"
+        if message["role"] == "assistant":
+            text = "我：" + text
+        lines.append(text)
+    return "\n".join(lines)
+
+# 上下文管理：每个智能体一份令牌预算，超出预算时将之前几天的对话压缩为滚动摘要
+# 系统提示词和私有信息（预言家查验结果、狼人刀人决定等）始终逐字保留
+class ContextManager:
+    def __init__(self, budget = None, summarizer = None):
+        self.budget = budget
+        self.summarizer = summarizer or compact_lines
+        self.pinned = []
+        # 每天开始时 history 的位置
+        self.day_starts = []
+        self.summary = ""
+        self.summary_message = None
+        # 将 history 中的记录展开为带 content 的消息，由智能体设置
+        self.render = lambda message: message
+        # 统计信息
+        self.stats = {"calls": 0, "prompt_tokens": 0, "peak_tokens": 0, "last_tokens": 0, "compactions": 0, "saved_tokens": 0}
+
+    # 记录新一天的开始位置
+    def mark_day(self, day, history):
+        self.day_starts.append((day, len(history)))
+
+    # 记录私有信息
+    def pin(self, text):
+        self.pinned.append(text)
+
+    # 请求前调用：超出预算时压缩，并记录本次请求的令牌数
+    # 压缩后最多占预算的3/4（摘要至多1/2，当天保留部分至多1/4），留出余量使之后的多次请求只追加不再压缩，保持前缀稳定
+    def fit(self, history):
+        tokens = self.count(history)
+        if self.budget and tokens > self.budget:
+            history = self.compact(history, self.cut_point(history, day_boundary = True))
+            if self.count(history) > self.budget * 3 // 4:
+                history = self.compact(history, self.cut_point(history, day_boundary = False))
+            after = self.count(history)
+            self.stats["compactions"] += 1
+            self.stats["saved_tokens"] += tokens - after
+            tokens = after
+        self.stats["calls"] += 1
+        self.stats["prompt_tokens"] += tokens
+        self.stats["last_tokens"] = tokens
+        self.stats["peak_tokens"] = max(self.stats["peak_tokens"], tokens)
+        return history
+
+    # 保存与恢复压缩状态，摘要消息以其在 history 中的位置记录
+    def state(self, history):
+        index = next((i for i, message in enumerate(history) if message is self.summary_message), None)
+        return {"pinned": self.pinned, "day_starts": self.day_starts, "summary": self.summary, "summary_index": index, "stats": self.stats}
+
+    def load_state(self, state, history):
+        self.pinned = list(state["pinned"])
+        self.day_starts = [tuple(one) for one in state["day_starts"]]
+        self.summary = state["summary"]
+        index = state["summary_index"]
+        self.summary_message = history[index] if index is not None else None
+        self.stats = dict(state["stats"])
+
+    def count(self, history):
+        return count_messages([self.render(message) for message in history])
+
+    # 压缩的截止位置：优先压缩到当天开始，否则仅保留不超过预算1/4的最近消息（至少保留最后一条）
+    # 最近一批事件（提问之前的最后一条事件消息）与私有信息一样始终逐字保留
+    def cut_point(self, history, day_boundary):
+        if day_boundary:
+            cut = self.day_starts[-1][1] if self.day_starts else 1
+        else:
+            cut = len(history) - 1
+            kept = count_messages([self.render(history[cut])])
+            while cut > 2:
+                size = count_messages([self.render(history[cut-1])])
+                if kept + size > self.budget // 4:
+                    break
+                kept += size
+                cut -= 1
+        latest = next((i for i in range(len(history) - 2, 0, -1) if "events" in history[i]), cut)
+        return min(cut, latest)
+
+    # 将 history[1:cut] 并入滚动摘要，返回新的 history
+    def compact(self, history, cut):
+        # 私有信息单独逐字保留，不进入摘要
+        old = [self.render(message) for message in history[1:cut] if message is not self.summary_message]
+        old = [message for message in old if message["content"] not in self.pinned]
+        if not old:
+            return history
+        part = self.summarizer(old)
+        self.summary = (self.summary + "\n" + part).strip() if self.summary else part
+        # 摘要本身最多占预算的一半，超出时舍弃最早的内容
+        if self.budget:
+            lines = self.summary.split("\n")
+            while len(lines) > 1 and count_tokens("\n".join(lines)) > self.budget // 2:
+                lines.pop(0)
+            self.summary = "\n".join(lines)
+        content = "以下为之前的游戏信息摘要：\n" + self.summary
+        if self.pinned:
+            content += "\n你掌握的私有信息：\n" + "\n".join(self.pinned)
+        self.summary_message = {"role": "user", "content": content}
+        history = [history[0], self.summary_message] + history[cut:]
+        # 之前记录的位置随之平移
+        shift = cut - 2
+        self.day_starts = [(day, max(2, index - shift)) for day, index in self.day_starts]
+        return history
@@ -0,0 +1,1188 @@
+import os
+import re
+import json
+import random
+import argparse
+import threading
+from time import sleep, perf_counter
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from agents import Agents, summarize_usage, configure_clients, close_clients
+from events import EventStore
+from context import compact_lines
+from answers import JSON_SPEC, unwrap, parse_choice, parse_pair
+from replay import Recorder, Replayer
+from telemetry import Telemetry
+from results import ResultStore
+from gamelog import GameLog, GAME_LOG_PATH
+
+# 初始化大模型API和model设置（例子），context 为模型的上下文长度（令牌数），reasoning 表示推理模型（思考过程计入输出长度），json 表示支持 JSON 模式
+EXAMPLE_AGENTS = [
+    {
+        "API": "",
+        "URL": "https://ark.cn-beijing.volces.com/api/v3",
+        "model": "doubao-1-5-pro-32k-character-250228",
+        "context": 32768,
+        "name": "豆包-1.5-pro"},
+    {
+        "API": "",
+        "URL": "https://openrouter.ai/api/v1",
+        "model": "meta-llama/llama-4-maverick:free",
+        "context": 131072,
+        "name": "llama-4-maverick"},
+    {
+        "API": "",
+        "URL": "https://generativelanguage.googleapis.com/v1beta/openai",
+        "model": "gemini-2.0-flash",
+        "context": 1048576,
+        "json": True,
+        "name": "Gemini-2.0-flash"},
+    {
+        "API": "",
+        "URL": "https://api.deepseek.com/v1",
+        "model": "deepseek-chat",
+        "context": 65536,
+        "json": True,
+        "name": "DeepSeek-V3"},
+    {
+        "API": "",
+        "URL": "https://spark-api-open.xf-yun.com/v2",
+        "model": "x1",
+        "context": 32768,
+        "reasoning": True,
+        "name": "讯飞星火-X1"},
+    {
+        "API": "",
+        "URL": "https://api.moonshot.cn/v1",
+        "model": "kimi-latest",
+        "context": 131072,
+        "json": True,
+        "name": "Kimi"},
+    {
+        "API": "s",
+        "URL": "https://dashscope.aliyuncs.com/compatible-mode/v1",
+        "model": "qwen-max-latest",
+        "context": 32768,
+        "json": True,
+        "name": "千问-max"},
+    {
+        "API": "",
+        "URL": "https://api.deepseek.com/v1",
+        "model": "deepseek-reasoner",
+        "context": 65536,
+        "reasoning": True,
+        "name": "DeepSeek-R1"},
+    {
+        "API": "",
+        "URL": "https://free.v36.cm/v1",
+        "model": "gpt-3.5-turbo-0125",
+        "context": 16385,
+        "json": True,
+        "name": "GPT-3.5"},
+]
+
+# 将全部大模型指向同一个服务地址（例如本地模拟服务 mock_server.py），模型名保持不变
+def with_base_url(agents, base_url, api_key = "mock"):
+    return [dict(config, URL=base_url, API=api_key) for config in agents]
+
+# 座位数多于大模型配置时循环复用配置，复用的配置在名称后加编号以区分（例如 Kimi-2）
+def seat_agents(agents, size):
+    seated = []
+    for i in range(size):
+        config = agents[i % len(agents)]
+        if i >= len(agents):
+            config = dict(config, name=f"{config['name']}-{i // len(agents) + 1}")
+        seated.append(config)
+    return seated
+
+# 9人预女猎板子
+ROLES = ["狼人", "狼人", "狼人", "平民", "平民", "平民", "预言家", "女巫", "猎人"]
+
+# 可选的板子（身份组成），也可以直接传入任意身份列表
+BOARDS = {
+    "9人预女猎": ROLES,
+    "12人预女猎守": ["狼人"] * 4 + ["平民"] * 4 + ["预言家", "女巫", "猎人", "守卫"],
+    "12人预女猎白": ["狼人"] * 4 + ["平民"] * 4 + ["预言家", "女巫", "猎人", "白痴"],
+}
+
+# 各身份的规则说明（写入系统提示词，按此顺序排列），狼人与平民之外的身份均为神职
+ROLE_RULES = {
+    "预言家": "预言家每晚可以查验一名玩家的身份",
+    "狼人": "狼人彼此之间知晓自己的狼队友，且被允许可以自刀",
+    "平民": None,
+    "女巫": "女巫仅能使用一次解药和毒药，且在一个晚上不能同时使用解药和毒药",
+    "猎人": "猎人只有被狼人杀死或被投票处决时可以开枪带走一位玩家，但被女巫毒杀时不能发动技能，存活状态不能开枪",
+    "守卫": "守卫每晚可以守护一名玩家（可以守护自己），被守护的玩家当晚不会被狼人杀死，但不能连续两晚守护同一名玩家，若被守护的玩家同时被女巫救下则仍然死亡（同守同救）",
+    "白痴": "白痴被投票处决时翻牌免于出局，之后不能再投票，被狼人杀死或被毒杀时正常死亡",
+}
+
+# 系统提示词中的板子说明，例如“一共由9名玩家组成……一共有3名狼人，3名平民，1名预言家，1名女巫和1名猎人”
+def board_rules(roles):
+    # 狼人、平民在前，神职在后
+    order = sorted(set(roles), key=lambda role: (role not in ("狼人", "平民"), list(ROLE_RULES).index(role)))
+    parts = [f"{roles.count(role)}名{role}" for role in order]
+    parts = parts[0] if len(parts) == 1 else "，".join(parts[:-1]) + "和" + parts[-1]
+    rules = "，".join(rule for role, rule in ROLE_RULES.items() if rule and role in roles)
+    return f"正在参与一场一共由{len(roles)}名玩家组成的狼人杀游戏。请牢记在该局游戏中，一共有{parts}。", f"{rules}。"
+
+# 检查身份组成：只能使用已知身份，至少一名狼人和一名好人，预言家、女巫、猎人、守卫、白痴各至多一名
+def check_board(roles):
+    for role in roles:
+        if role not in ROLE_RULES:
+            raise ValueError(f"未知的身份：{role}")
+    if "狼人" not in roles or all(role == "狼人" for role in roles):
+        raise ValueError("身份组成至少需要一名狼人和一名好人")
+    for role in ROLE_RULES:
+        if role not in ("狼人", "平民") and roles.count(role) > 1:
+            raise ValueError(f"身份组成中最多只能有一名{role}")
+
+# 一天中依次进行的阶段（WerewolfEngine 的方法名），每个阶段结束后保存断点
+# 夜晚：预言家、狼人、女巫；白天：天亮、猎人开枪、遗言、发言、投票、猎人开枪、遗言
+PHASES = ["night_actions", "dawn", "hunter_action", "last_words", "speeches", "day_vote", "hunter_action", "last_words"]
+# 断点格式版本，阶段表变化时递增；断点同时保存下一阶段的名称，读取时与阶段表核对
+CHECKPOINT_VERSION = 2
+
+# 夜晚各行动及其依赖（按结算顺序排列）：预言家查验、狼人与守卫互不依赖，女巫需要知道狼人的结果
+# 守卫最后结算，守护生效时挡下狼人的刀口（同守同救时仍然死亡）
+NIGHT_ACTIONS = [("seer", ()), ("wolf", ()), ("witch", ("wolf",)), ("guard", ())]
+# 夜晚行动对应的身份，板子中没有该身份时跳过该行动
+NIGHT_ROLES = {"seer": "预言家", "wolf": "狼人", "witch": "女巫", "guard": "守卫"}
+
+# 全部固定的上帝播报（含带编号的变体），用于预热语音缓存，需与游戏逻辑中的播报文本保持一致
+def narrator_lines(n = 9):
+    lines = [
+        "天黑请闭眼，预言家请睁眼", "你要验吗？你要验谁？", "预言家请闭眼，狼人请睁眼", "你们要杀谁？",
+        "狼人请闭眼，女巫请睁眼。", "今晚要死的人是  ，你要救吗？", "你要使用毒药吗？你要毒谁？",
+        "天亮了，昨天是平安夜。", "现在将按顺序进行发言。", "发言结束，现在开始投票。", "平票或弃票过半，今天没有人被处决。",
+        "游戏结束！狼人获胜！", "游戏结束！好人获胜！", "请投票选出本场游戏的MVP和战犯。",
+        "女巫请闭眼，守卫请睁眼。", "你要守护谁？",
+        # 自定义板子中缺少预言家或女巫时的睁眼播报
+        "天黑请闭眼，狼人请睁眼", "预言家请闭眼，守卫请睁眼。", "狼人请闭眼，守卫请睁眼。"
+    ]
+    for x in range(1, n+1):
+        lines.append(f"天亮了，昨天{x}号玩家死亡。")
+        lines.append(f"{x}号玩家被投票处决。")
+        lines.append(f"{x}号玩家翻牌为白痴，免于出局。")
+        lines.append(f"请{x}号玩家发表遗言")
+        for y in range(1, n+1):
+            if y != x:
+                lines.append(f"天亮了，昨天{x}号玩家和{y}号玩家死亡。")
+            lines.append(f"{x}号玩家身份为猎人，他选择开枪带走{y}号玩家。")
+    return lines
+
+# 发言中的身份声明，例如“我是预言家”
+CLAIM = re.compile(r"我(?:就是|是|的身份是)(预言家|女巫|猎人|平民)")
+
+# 根据事件生成游戏日志文本，无需记录日志的事件返回 None
+def describe_event(event, game):
+    event_type = event[0]
+    if event_type == "night":
+        return f"================================== 第 {game.day} 天夜晚 ================================="
+    elif event_type == "day":
+        return f"================================== 第 {game.day} 天白天 ================================="
+    elif event_type == "seer":
+        _, answer, role = event
+        return f"{game.seer_id}号玩家(预言家)查验{answer}号玩家({game.players[answer-1]['role']})身份为{role}"
+    elif event_type == "wolf_result":
+        _, result = event
+        # 无女巫或女巫无解药（或已死亡），直接杀死更新日志；有守卫时刀口在守卫结算后由 night_kill 记录
+        witch = game.players[game.witch_id-1] if game.witch_id else None
+        if not game.guard_id and (not witch or not witch["antidote"] or not witch["alive"]):
+            return f"狼人杀死了{result}号玩家({game.players[result-1]['role']})"
+    elif event_type == "witch_antidote":
+        _, answer, the_death = event
+        # 根据实际行动结果更新日志
+        if answer == "救":
+            return f"{game.witch_id}号玩家(女巫)使用解药救下{the_death}号玩家({game.players[the_death-1]['role']})"
+        if not game.guard_id:
+            return f"狼人杀死了{the_death}号玩家({game.players[the_death-1]['role']})"
+    elif event_type == "night_kill":
+        _, result = event
+        return f"狼人杀死了{result}号玩家({game.players[result-1]['role']})"
+    elif event_type == "witch_poison":
+        _, answer = event
+        if answer != "不用":
+            return f"{game.witch_id}号玩家(女巫)毒杀{answer}号玩家({game.players[answer-1]['role']})"
+    elif event_type == "all_result":
+        _, result = event
+        if result != 0:
+            return f"{result}号玩家({game.players[result-1]['role']})被投票处决"
+        return f"平票或弃票过半，今天没有人被投票处决"
+    elif event_type == "hunter":
+        _, answer = event
+        return f"{game.hunter_id}号玩家(猎人)开枪带走{answer}号玩家({game.players[answer-1]['role']})"
+    elif event_type == "guard":
+        # blocked 为 True 时挡下了狼人的刀口，为 False 时同守同救，None 时守护的不是刀口
+        _, answer, blocked = event
+        line = f"{game.guard_id}号玩家(守卫)守护{answer}号玩家({game.players[answer-1]['role']})"
+        if blocked is True:
+            line += "，挡下了狼人的刀口"
+        elif blocked is False:
+            line += f"，同守同救，{answer}号玩家仍然死亡"
+        return line
+    elif event_type == "idiot":
+        _, answer = event
+        return f"{answer}号玩家(白痴)被投票后翻牌，免于出局"
+    elif event_type == "game_over":
+        return f"游戏结束!\n{game.winner}阵营获胜！"
+    return None
+
+# 流式发言处理：增量删除()内容（与 re.sub(r'\([^)]*\)', '', ...) 结果一致），并把完整的句子交给 on_sentence
+class SpeechStream:
+    ENDINGS = "。！？!?；;\n"
+
+    def __init__(self, on_sentence):
+        self.on_sentence = on_sentence
+        # 已清理的发言文本（供 UI 显示）与尚未成句的部分
+        self.text = ""
+        self.pending = ""
+        # 括号内的缓冲，若到结尾仍未闭合则原样保留
+        self.bracket = None
+        self.last = None
+
+    # 输入一段新文本，返回可显示文本是否变化
+    def feed(self, delta):
+        before = len(self.text)
+        for char in delta:
+            if self.bracket is not None:
+                self.bracket += char
+                if char == ")":
+                    self.bracket = None
+                continue
+            if char == "(":
+                self.bracket = char
+                continue
+            self.text += char
+            self.pending += char
+            if char in self.ENDINGS:
+                self.flush()
+        return len(self.text) != before
+
+    # 交出一句完整的发言
+    def flush(self):
+        sentence = self.pending.strip()
+        self.pending = ""
+        if sentence:
+            self.last = self.on_sentence(sentence) or self.last
+
+    # 发言结束，未闭合的括号内容原样保留，剩余部分作为最后一句
+    def close(self):
+        if self.bracket is not None:
+            self.text += self.bracket
+            self.pending += self.bracket
+            self.bracket = None
+        self.flush()
+
+# 定义AI狼人杀游戏引擎，不依赖 UI 和语音播报
+class WerewolfEngine:
+    def __init__(self, matchs=1, agents=None, listener=None, voice=None, pause=0, max_workers=1, stream=False, context_budget=None, checkpoint=None, record=None, replay=None, realtime=False, telemetry=None, compact_decisions=True, reasks=2, results=None, log=None, board=None):
+        # 比赛总轮次
+        self.matchs = matchs
+        # 板子（身份组成），缺省为9人预女猎；座位数即身份数，大模型配置不足时循环复用
+        self.board = list(board or ROLES)
+        check_board(self.board)
+        self.size = len(self.board)
+        self.agents = seat_agents(agents or EXAMPLE_AGENTS, self.size)
+        # listener 接收全部游戏事件（与原 result_queue 中的事件一致），voice 为可选的语音播报
+        self.listener = listener
+        self.voice = voice
+        # 阶段之间的停顿秒数，无界面运行时为0
+        self.pause = pause
+        # 停止信号（界面关闭时由 stop 置位），游戏循环在当前阶段结束后停止，不再进行后续阶段和本局结算
+        self.stopping = threading.Event()
+        # 互不依赖的决策（投票、狼人盲发言、MVP投票）的并发数，1为依次串行
+        self.max_workers = max_workers
+        # 玩家发言是否流式生成：边生成边推送文本（*_partial 事件），完整的句子立即交给语音播报
+        self.stream = stream
+        # 每个智能体的上下文令牌预算，None 时取模型上下文长度的3/4，超出后压缩之前几天的历史
+        self.context_budget = context_budget
+        # 查验、投票、用药、开枪等决策只发送引擎生成的局势摘要（不带完整历史），False 时与发言相同使用完整历史
+        self.compact_decisions = compact_decisions
+        # 决策回答无法解析或不合法时重新提问的次数，之后使用确定的默认值
+        self.reasks = reasks
+        # 断点文件路径，每完成一个阶段保存一次，None 时不保存
+        self.checkpoint = checkpoint
+        # record 为记录文件路径，记录全部大模型回答、身份分配、随机选择和语音播报文本
+        # replay 为回放文件路径，按记录重现整场比赛而不请求大模型，realtime 为 True 时按记录的耗时回放
+        self.recorder = Recorder(record) if record else None
+        self.replayer = Replayer(replay, realtime) if replay else None
+        if self.replayer:
+            self.matchs = self.replayer.meta.get("matchs", matchs)
+            # 回放时使用记录的板子
+            if "board" in self.replayer.meta:
+                self.board = self.replayer.meta["board"]
+                self.size = len(self.board)
+                self.agents = seat_agents(agents or EXAMPLE_AGENTS, self.size)
+        # 追踪与指标：每个阶段和每次大模型请求记录一个 span
+        self.telemetry = telemetry or Telemetry()
+        # results 为结果库路径或已打开的 ResultStore（由调用方负责关闭），每局结束后写入本局结果并更新等级分，回放时不写入
+        self.results = None
+        if results and not self.replayer:
+            self.results = ResultStore(results) if isinstance(results, str) else results
+        # 结构化游戏日志：log 为 JSONL 文件路径（按大小轮换），None 时只在内存中保留本局记录
+        self.log = GameLog(log)
+        if self.recorder:
+            self.recorder.write("meta", matchs=self.matchs, agents=[config["name"] for config in self.agents], board=self.board)
+        # 初始化玩家得分情况和当前游戏轮次
+        self.points = [{"id": i+1, "point": 0} for i in range(self.size)]
+        self.match = 0
+        self.day = 1
+        self.players = []
+        self.in_game = False
+        # 各阶段耗时记录（全部比赛累计）
+        self.timings = []
+
+    # 发送游戏事件，同时写入游戏日志
+    def emit(self, *event):
+        self.log.event(self.match, self.day, event, describe_event(event, self))
+        if self.listener:
+            self.listener(event)
+
+    # 语音播报，未配置语音时跳过
+    # 语音在后台排队合成与播放，游戏线程不等待，返回的语音可用于等待播放完毕
+    def speak(self, text, id = 0):
+        if self.recorder:
+            self.recorder.write("speech", id=id, text=text)
+        if self.voice:
+            return self.voice.say(text, id = id)
+
+    # 紧随行动标注事件（查验、投票、用药、守护、开枪、翻牌）的上帝播报：等待本条播报播放完毕，
+    # 使 UI 上的标注在播报期间保持显示，之后才发送清除标注的事件；未配置语音时不等待
+    def announce(self, text):
+        utterance = self.speak(text)
+        if utterance:
+            utterance.wait()
+
+    # 玩家发言（狼人讨论、白天发言、遗言），kind 为对应的事件类型，phase 为统计用的游戏阶段
+    # 流式模式下边生成边向 UI 推送已生成的文本，并把完整的句子立即交给语音播报（排在上一名玩家的语音之后）
+    # previous 为上一名玩家仍可能在播放的语音，播放完毕前生成的文本暂不推送，之后一并推送
+    def player_speech(self, id, query, kind, phase, previous = None):
+        agent = self.players[id-1]["Agent"]
+        if not self.stream:
+            return agent.chat(query, phase = phase), None
+        speech = SpeechStream(lambda sentence: self.speak(sentence, id = id))
+        def on_text(delta):
+            if speech.feed(delta) and (previous is None or previous.wait(0)):
+                self.emit(kind + "_partial", id, speech.text)
+        answer = agent.chat(query, on_text = on_text, phase = phase)
+        speech.close()
+        return answer, speech
+
+    # 玩家进行决策，compact 且 compact_decisions 时只发送局势摘要并限制输出长度，否则使用完整历史
+    # 服务商支持 JSON 模式时要求以 JSON 格式回答
+    def decide(self, id, query, phase, compact = True):
+        agent = self.players[id-1]["Agent"]
+        config = self.agents[id-1]
+        options = None
+        if config.get("json"):
+            query += JSON_SPEC
+            options = {"response_format": {"type": "json_object"}}
+        if not (compact and self.compact_decisions):
+            return agent.chat(query, phase = phase, options = options)
+        max_tokens = None if config.get("reasoning") else 32 if options else 16
+        return agent.decide(query, self.decision_summary(id), phase, max_tokens, options)
+
+    # 进行决策并校验回答，parse 返回 (结果, 错误说明)
+    # 回答无法解析或不合法时指出错误重新提问，至多 reasks 次，仍不合法时返回确定的默认值 default
+    def ask(self, id, query, phase, parse, default, compact = True):
+        prompt = query
+        for _ in range(self.reasks + 1):
+            answer = self.decide(id, prompt, phase, compact)
+            value, error = parse(answer)
+            if error is None:
+                return value
+            self.telemetry.count("invalid_answers", phase=phase, match=self.match, day=self.day, seat=id)
+            # 错误说明放在提问之前，提问仍在最后一行
+            prompt = f"你的回答“{' '.join(unwrap(answer).split())[:50]}”无效：{error}。" + query
+        self.telemetry.count("answer_fallbacks", phase=phase, match=self.match, day=self.day, seat=id)
+        return default
+
+    # 存活玩家编号，可排除指定玩家
+    def alive_ids(self, exclude = None):
+        return [player["id"] for player in self.players if player["alive"] and player["id"] != exclude]
+
+    # 决策时的局势摘要，由事件库中该玩家可见的事件生成：存活情况、私有信息、死亡与投票记录、
+    # 更早发言中的身份声明以及最近一天的发言（截取开头）
+    def decision_summary(self, id):
+        events = self.store.knowledge(id, len(self.store.events) - 1)
+        alive = [player["id"] for player in self.players if player["alive"]]
+        dead = [player["id"] for player in self.players if not player["alive"]]
+        lines = [f"当前为第{self.day}天。存活玩家：{'、'.join(map(str, alive))}号；已出局玩家：{'、'.join(map(str, dead)) + '号' if dead else '无'}。"]
+        player = self.players[id-1]
+        if player["role"] == "女巫":
+            lines.append(f"你的解药{'尚未使用' if player['antidote'] else '已用完'}，毒药{'尚未使用' if player['poison'] else '已用完'}。")
+        private = [event["text"] for event in events if event["pinned"]]
+        if private:
+            lines.append("你掌握的私有信息：" + " ".join(private))
+        record = [event["text"] for event in events if event.get("kind") in ("death", "vote")]
+        if record:
+            lines.append("场上记录：\n" + "\n".join(record))
+        speeches = [event for event in events if event.get("kind") in ("speech", "wolf_chat")]
+        if speeches:
+            last = speeches[-1]["day"]
+            claims = []
+            for event in speeches:
+                seat = re.match(r"(\d+)号玩家", event["text"])
+                if event["day"] < last and seat:
+                    claims.extend(f"{seat.group(1)}号玩家自称{role}" for role in CLAIM.findall(event["text"]))
+            if claims:
+                lines.append("此前的身份声明：" + "，".join(dict.fromkeys(claims)))
+            lines.append(f"第{last}天的发言摘要：\n" + compact_lines([{"role": "user", "content": event["text"]} for event in speeches if event["day"] == last], limit = 80))
+        return "\n".join(lines)
+
+    # 发言文本确定后（已同步给其他玩家）：等待上一名玩家播报完毕，再向 UI 显示本次发言，本次语音排队播放而不等待
+    # 返回本次发言的语音，下一名玩家据此等待；下一名玩家的生成与本次播放同时进行（发言流水线）
+    def present_speech(self, kind, id, answer, speech, previous):
+        if previous:
+            previous.wait()
+        self.emit(kind, id, answer)
+        if speech:
+            return speech.last
+        return self.speak(answer, id = id)
+
+    # 并发执行互不依赖的决策，结果按输入顺序返回，保证事件顺序确定
+    def gather(self, func, items):
+        items = list(items)
+        if self.max_workers <= 1 or len(items) <= 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as pool:
+            return list(pool.map(func, items))
+
+    # 阶段之间的停顿，先等待已排队的语音播报完毕
+    def wait(self):
+        if self.voice:
+            self.voice.wait()
+        if self.pause:
+            self.stopping.wait(self.pause)
+
+    # 请求停止游戏，由其他线程调用，之后等待游戏线程结束
+    def stop(self):
+        self.stopping.set()
+
+    # 进行全部比赛，返回积分情况；存在断点时先从断点继续未完成的比赛
+    def run(self):
+        if self.checkpoint and self.load_checkpoint() and self.in_game:
+            self.play_game()
+        while self.match < self.matchs:
+            self.start_game()
+            self.play_game()
+        return self.points
+
+    # 开始游戏，初始化游戏状态，roles 指定各座位身份，缺省时随机抽取
+    def start_game(self, roles=None):
+        self.match += 1
+        self.in_game = True
+        self.game_over = False
+        self.winner = None
+        self.day = 1
+        # 当前进行到的阶段（PHASES 中的位置）
+        self.step = 0
+        self.players = []
+        # 本局全部投票（狼人刀人、白天放逐、猎人开枪、MVP与战犯），写入结果库
+        self.votes = []
+        # 夜晚死亡玩家、等待开枪的猎人和等待发表遗言的玩家
+        self.will_death = [0, 0]
+        self.shooter = 0
+        self.dying = []
+        # 本局唯一的事件库，所有玩家按可见范围共享
+        self.store = EventStore()
+        # 创造玩家
+        self.create_players(roles)
+        self.log.start(self.match, [{"seat": player["id"], "name": player["name"], "model": self.agents[i]["model"], "role": player["role"]} for i, player in enumerate(self.players)])
+
+    # 进行一整局游戏，包括本场游戏总结
+    def play_game(self):
+        self.game_loop()
+        if self.stopping.is_set():
+            return
+        self.wait()
+        self.timed("game_result")
+        self.in_game = False
+        self.save_checkpoint()
+        self.log.sync()
+        # 本局语音全部播报完毕再进入下一局
+        if self.voice:
+            self.voice.wait()
+
+    # 创造玩家
+    def create_players(self, roles=None):
+        # 随机数抽取玩家身份，回放时使用记录的身份
+        if self.replayer:
+            self.roles = self.replayer.next("roles")["roles"]
+        elif roles:
+            self.roles = list(roles)
+        else:
+            self.roles = list(self.board)
+            random.shuffle(self.roles)
+        if self.recorder:
+            self.recorder.write("roles", match=self.match, roles=self.roles)
+        self.find_roles()
+
+        # 创建玩家，调用智能体类
+        table, rules = board_rules(self.roles)
+        for i, role in enumerate(self.roles):
+            # 基本规则阐述
+            system_prompt = f"你是一名狼人杀玩家，{table}本局游戏没有警长竞选环节，也没有警徽一说。白天发言顺序按夜晚死亡玩家的后置位开始依次发言。一旦所有村民死亡或者所有神职死亡，狼人将获得胜利。若狼人全部死亡则好人胜利。游戏结束时请所有人一起评选出本场发挥最好的玩家和发挥最差的玩家。{rules}"
+            system_prompt += f"你在本局游戏中为{i+1}号玩家，身份为{role}，请牢记你的身份信息，请你保持冷静思考注重分析，尽全力帮助自己的阵营获得胜利，包括但不限于说谎搅混水穿别人身份等。"
+            # 狼人额外告知其狼队友
+            if role == "狼人":
+                others = [id for id in self.wolf_ids if id != i+1]  # 排除自己
+                system_prompt += f"本局游戏中，你的狼队友是：{', '.join(map(str, others))}号玩家，请你们互相配合，尽力取胜。玩狼人的状态，就是要会“装”，摆正心态，要把自己完全的代入好人角色，从好人视角去思考应该如何发言。如果不幸被预言家验到真实身份，千万不要慌，这时候可以伪装成其它神职身份，不仅可以最大限度保住自己，也可以尽快帮助队友，确认场上神职的位置。在于不要被别人发现你的视角，发言可以模棱两可一些，尽快找到神职，将其推出局。狼人互相之间可以知道队友，要完全配合队友"
+
+            # 创建玩家，包含其大模型和各种状态
+            self.players.append({
+                "id": i + 1,
+                "role": role,
+                "alive": True,
+                "Agent": self.create_agent(i, system_prompt),
+                "name": self.agents[i]["name"],
+                # 如果是女巫，额外添加解药和毒药状态；守卫记录上一晚守护的玩家；白痴记录是否已翻牌
+                **({"antidote": True, "poison": True} if role == "女巫" else {}),
+                **({"guarded": 0} if role == "守卫" else {}),
+                **({"revealed": False} if role == "白痴" else {})
+            })
+
+    # 存储本局游戏特殊身份 ID（板子中没有的身份为0），以及本局进行的夜晚行动
+    def find_roles(self):
+        self.wolf_ids = [i+1 for i, role in enumerate(self.roles) if role == "狼人"]
+        self.seer_id = self.witch_id = self.hunter_id = self.guard_id = 0
+        for i, role in enumerate(self.roles):
+            if role == "预言家":
+                self.seer_id = i + 1
+            elif role == "女巫":
+                self.witch_id = i + 1
+            elif role == "猎人":
+                self.hunter_id = i + 1
+            elif role == "守卫":
+                self.guard_id = i + 1
+        self.night_table = [(name, depends) for name, depends in NIGHT_ACTIONS if NIGHT_ROLES[name] in self.roles]
+
+    # 为第 i 个座位创建智能体
+    def create_agent(self, i, system_prompt):
+        config = self.agents[i]
+        agent = Agents(config["API"], config["URL"], config["model"], system_prompt, self.budget(config), self.store, i + 1, self.recorder, self.replayer, self.telemetry)
+        agent.role = self.roles[i]
+        return agent
+
+    # 平票时随机选择，结果写入记录，回放时使用记录的结果
+    def choose(self, targets):
+        if len(targets) == 1:
+            return targets[0]
+        if self.replayer:
+            return self.replayer.next("choice")["value"]
+        value = random.choice(targets)
+        if self.recorder:
+            self.recorder.write("choice", targets=targets, value=value)
+        return value
+
+    # 智能体的上下文令牌预算
+    def budget(self, config):
+        if self.context_budget:
+            return self.context_budget
+        if config.get("context"):
+            return config["context"] * 3 // 4
+        return None
+
+    # 游戏逻辑循环：按 PHASES 依次进行各阶段，每完成一个阶段保存一次断点
+    def game_loop(self):
+        while not self.game_over and not self.stopping.is_set():
+            self.timed(PHASES[self.step])
+            self.step += 1
+            # 一天结束，若游戏未结束延迟后进入下一天
+            if self.step == len(PHASES) and not self.game_over:
+                self.step = 0
+                self.day += 1
+                self.wait()
+            self.save_checkpoint()
+
+    # 进行一个阶段并记录耗时，大模型回答无法解析时记录解析失败
+    def timed(self, phase):
+        start = perf_counter()
+        with self.telemetry.span("phase", phase=phase, match=self.match, day=self.day):
+            try:
+                getattr(self, phase)()
+            except (ValueError, IndexError):
+                self.telemetry.count("parse_failures", phase=phase, match=self.match, day=self.day)
+                raise
+            finally:
+                # 阶段结束，游戏日志写入磁盘
+                self.log.sync()
+        self.timings.append({"match": self.match, "day": self.day, "phase": phase, "seconds": perf_counter() - start})
+
+    # 断点：本局全部状态（玩家、积分、事件库、各智能体的对话历史）写入 JSON 文件
+    # 先写临时文件再替换，避免中断留下残缺文件
+    def save_checkpoint(self):
+        if not self.checkpoint:
+            return
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "phase": PHASES[self.step] if self.step < len(PHASES) else None,
+            "board": self.board,
+            "match": self.match,
+            "in_game": self.in_game,
+            "day": self.day,
+            "step": self.step,
+            "game_over": self.game_over,
+            "winner": self.winner,
+            "roles": self.roles,
+            "points": self.points,
+            "players": [{key: value for key, value in player.items() if key != "Agent"} for player in self.players],
+            "will_death": self.will_death,
+            "shooter": self.shooter,
+            "dying": self.dying,
+            "log": self.log.state(),
+            "votes": self.votes,
+            "store": self.store.state(),
+            "agents": [player["Agent"].state() for player in self.players]
+        }
+        with open(self.checkpoint + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(self.checkpoint + ".tmp", self.checkpoint)
+
+    # 读取断点，恢复到最后完成的阶段，断点不存在时返回 False
+    # 断点的格式版本、板子或阶段与当前设置不符时抛出 ValueError，不在错误的阶段继续
+    def load_checkpoint(self):
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return False
+        with open(self.checkpoint, encoding="utf-8") as f:
+            state = json.load(f)
+        self.check_checkpoint(state)
+        for key in ("match", "in_game", "day", "step", "game_over", "winner", "roles", "points", "will_death", "shooter", "dying"):
+            setattr(self, key, state[key])
+        self.votes = state["votes"]
+        self.log.load_state(state["log"])
+        self.find_roles()
+        self.store = EventStore()
+        self.store.load_state(state["store"])
+        self.players = []
+        for player, agent_state in zip(state["players"], state["agents"]):
+            agent = self.create_agent(player["id"]-1, agent_state["history"][0]["content"])
+            agent.load_state(agent_state)
+            self.players.append({**player, "Agent": agent})
+        return True
+
+    # 核对断点的格式版本、板子（身份组成）和下一阶段的名称
+    def check_checkpoint(self, state):
+        if state.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"断点 {self.checkpoint} 的格式版本 {state.get('version')} 不受支持（当前为 {CHECKPOINT_VERSION}）")
+        if sorted(state["board"]) != sorted(self.board):
+            raise ValueError(f"断点 {self.checkpoint} 的板子 {','.join(state['board'])} 与当前板子不符，无法继续")
+        step = state["step"]
+        if state["phase"] != (PHASES[step] if step < len(PHASES) else None):
+            raise ValueError(f"断点 {self.checkpoint} 的阶段 {state['phase']} 与阶段表不符，无法继续")
+
+    # 夜晚：按 NIGHT_ACTIONS 的依赖关系进行本局板子中有的各行动
+    # 每个行动分为决策（请求大模型，*_decide）和结算（更新状态、发布事件、上帝播报与 UI 事件，*_apply）
+    # 依赖已结算的行动随即开始决策，可并发进行；结算始终按 NIGHT_ACTIONS 的顺序依次进行，观众看到的事件和播报顺序不变
+    def night_actions(self):
+        self.nightfall()
+        if self.max_workers <= 1:
+            for name, _ in self.night_table:
+                getattr(self, name + "_apply")(getattr(self, name + "_decide")())
+            return
+        applied = set()
+        futures = {}
+        with ThreadPoolExecutor(max_workers=len(self.night_table)) as pool:
+            for name, _ in self.night_table:
+                for other, depends in self.night_table:
+                    if other not in futures and applied.issuperset(depends):
+                        futures[other] = pool.submit(getattr(self, other + "_decide"))
+                getattr(self, name + "_apply")(futures[name].result())
+                applied.add(name)
+
+    # 夜晚开始
+    def nightfall(self):
+        # 初始化夜晚死亡玩家的ID，self.will_death[0]为狼人杀死，self.will_death[1]为女巫毒死
+        self.will_death = [0, 0]
+
+        # 发送游戏事件
+        self.emit("night")
+        # 告知各位玩家游戏进程
+        self.store.day = self.day
+        for player in self.players:
+            player["Agent"].new_day(self.day)
+        self.store.publish(f"天黑请闭眼。（当前第{self.day}天夜晚）")
+
+    # 预言家选择查验的玩家，预言家已死亡时为 None
+    def seer_decide(self):
+        if not self.players[self.seer_id-1]["alive"]:
+            return None
+        # 只能查验其他存活玩家，默认查验编号最小的玩家
+        legal = self.alive_ids(exclude = self.seer_id)
+        return self.ask(self.seer_id, "现在，你可以选择查验一位玩家的身份。你的回复应当是一个纯数字x，x为你要查验身份的玩家编号，不要过多阐述，直接给出x", "seer", lambda text: parse_choice(text, legal), legal[0])
+
+    # 夜晚行动开始时的上帝播报：上一个行动的身份闭眼，本行动的身份睁眼，板子中没有的身份跳过
+    def wake(self, name):
+        names = [one for one, _ in self.night_table]
+        index = names.index(name)
+        previous = NIGHT_ROLES[names[index-1]] if index else "天黑"
+        return f"{previous}请闭眼，{NIGHT_ROLES[name]}请睁眼"
+
+    # 预言家行动结算
+    def seer_apply(self, answer):
+        self.speak(self.wake("seer")) # 上帝语音播报
+        if answer is not None:
+            role = self.players[answer-1]["role"]
+            role = "好人" if role != "狼人" else "狼人"
+            # 告知其查验目标身份
+            self.store.publish(f"{answer}号玩家的身份是{role}", to=[self.seer_id], pinned=True)
+            # 发送预言家行动
+            self.emit("seer", answer, role)
+        self.announce("你要验吗？你要验谁？") # 上帝语音播报
+        # 预言家行动结束，令 UI 初始化
+        self.emit("set_up")
+
+    # 狼人讨论与投票
+    # 狼人可先进行简单沟通，无序发言，盲发言，讨论结果仅其他存活狼人可见，之后投票
+    def wolf_decide(self):
+        wolves = [id for id in self.wolf_ids if self.players[id-1]["alive"]]
+        query = "作为狼人，现在你可以与其他狼队友进行沟通，说出今晚想要杀死的玩家，并给出理由。你的回复应当尽量简短，200字即可。"
+        words = []
+        presented = self.stream and self.max_workers <= 1
+        if presented:
+            # 串行流式：此时预言家已结算，依次流式发言并直接展示，上一名狼人播报时下一名狼人已开始生成
+            self.speak(self.wake("wolf")) # 上帝语音播报
+            previous = None
+            for id in wolves:
+                answer, speech = self.player_speech(id, query, "wolf_words", "wolf_chat", previous)
+                answer = answer.strip() # 最大限度防止大模型错误输出
+                words.append({"id": id, "words": answer})
+                previous = self.present_speech("wolf_words", id, answer, speech, previous)
+            if previous:
+                previous.wait()
+        else:
+            # 盲发言互不依赖，并发生成，结算时依次播报
+            answers = self.gather(lambda id: self.players[id-1]["Agent"].chat(query, phase="wolf_chat"), wolves)
+            words = [{"id": id, "words": answer.strip()} for id, answer in zip(wolves, answers)]
+
+        # 传递狼人讨论结果，仅其他存活狼人可见
+        for other in words:
+            self.store.publish(f"{other['id']}号玩家认为" + f"{other['words']}", to=[id for id in wolves if id != other["id"]], kind="wolf_chat")
+
+        # 狼人投票，可以投任意存活玩家（允许自刀），默认投编号最小的好人
+        legal = self.alive_ids()
+        default = next((id for id in legal if id not in self.wolf_ids), legal[0])
+        answers = self.gather(lambda id: self.ask(id, "作为狼人，请根据所有信息投票给出今晚想要杀死的玩家。你的回复应当是一个纯数字x，x为你要投票杀死的玩家编号，不要过多阐述，直接给出x", "wolf_vote", lambda text: parse_choice(text, legal), default), wolves)
+        return {"wolves": wolves, "words": words, "presented": presented, "votes": list(zip(wolves, answers))}
+
+    # 狼人行动结算
+    def wolf_apply(self, result):
+        wolves = result["wolves"]
+        self.wolf_words = result["words"]
+        if not result["presented"]:
+            self.speak(self.wake("wolf")) # 上帝语音播报
+            previous = None
+            for one in self.wolf_words:
+                # 令 UI 更新，同时进行狼人发言
+                previous = self.present_speech("wolf_words", one["id"], one["words"], None, previous)
+            if previous:
+                previous.wait()
+        # 狼人发言结束，令 UI 初始化
+        self.emit("set_up")
+
+        wolf_votes = [{"id": i+1, "votes": 0} for i in range(self.size)]
+        wolf_results = []
+        for id, answer in result["votes"]:
+            wolf_votes[answer-1]["votes"] += 1
+            wolf_results.append([id, answer])
+            self.votes.append({"day": self.day, "kind": "wolf", "voter": id, "target": answer})
+        # 发送狼人投票结果
+        self.emit("wolf_votes", wolf_results)
+        self.announce("你们要杀谁？") # 上帝语音播报
+
+        # 解析得票最多的玩家ID，若平票在其中随机选择
+        max_votes = max(one["votes"] for one in wolf_votes)
+        targets = [one["id"] for one in wolf_votes if one["votes"] == max_votes]
+        self.will_death[0] = self.choose(targets)
+        # 狼人的刀口，守卫结算时使用（女巫救人后 will_death[0] 为0）
+        self.night_kill = self.will_death[0]
+        # 发送结果，进行游戏日志更新
+        self.emit("wolf_result", self.will_death[0])
+        # 向所有存活狼人同步信息
+        self.store.publish(f"第{self.day}天夜晚，你们准备杀死{self.will_death[0]}号玩家。", to=wolves, pinned=True)
+
+    # 女巫是否使用解药和毒药，未被询问时为 None（同一晚不能同时使用解药和毒药）
+    def witch_decide(self):
+        witch = self.players[self.witch_id-1]
+        antidote = poison = None
+        if not witch["alive"]:
+            return antidote, poison
+        if witch["antidote"]:
+            antidote = self.ask(self.witch_id, f"{self.will_death[0]}号玩家将要死亡，你要对他使用解药救他吗？请直接回复救/不救，不要过多阐述", "witch", lambda text: parse_choice(text, [], ("救", "不救")), "不救")
+        if antidote != "救" and witch["poison"]:
+            # 只能毒其他存活玩家，默认不用
+            legal = self.alive_ids(exclude = self.witch_id)
+            poison = self.ask(self.witch_id, f"你要使用毒药吗？如果用，你的回复应当是一个纯数字x，x为你要用毒药杀死的玩家编号，直接给出x，不要过多阐述，；如果不用，请直接回复不用，不要过多阐述。", "witch", lambda text: parse_choice(text, legal, ("不用",)), "不用")
+        return antidote, poison
+
+    # 女巫行动结算
+    def witch_apply(self, result):
+        antidote, poison = result
+        self.speak(self.wake("witch") + "。") # 上帝语音播报
+        if antidote is not None:
+            # 发送结果
+            self.emit("witch_antidote", antidote, self.will_death[0])
+            if antidote == "救":
+                # 救下玩家更新状态，决策不计入对话历史，由事件告知女巫
+                self.store.publish(f"第{self.day}天夜晚，你使用解药救下了{self.will_death[0]}号玩家。", to=[self.witch_id], pinned=True)
+                self.will_death[0] = 0
+                self.players[self.witch_id-1]["antidote"] = False
+
+        self.announce("今晚要死的人是  ，你要救吗？") # 上帝语音播报
+        self.emit("set_up")
+
+        if poison is not None:
+            # 发送结果
+            self.emit("witch_poison", poison)
+            if poison != "不用":
+                # 毒杀玩家更新状态
+                self.will_death[1] = poison
+                self.players[self.witch_id-1]["poison"] = False
+                self.store.publish(f"第{self.day}天夜晚，你使用毒药毒杀了{self.will_death[1]}号玩家。", to=[self.witch_id], pinned=True)
+
+        self.announce("你要使用毒药吗？你要毒谁？") # 上帝语音播报
+        self.emit("set_up")
+
+    # 守卫选择守护的玩家（不能连续两晚守护同一名玩家），守卫已死亡时为 None
+    def guard_decide(self):
+        guard = self.players[self.guard_id-1]
+        if not guard["alive"]:
+            return None
+        # 默认守护编号最小的可守护玩家
+        legal = [id for id in self.alive_ids() if id != guard["guarded"]]
+        return self.ask(self.guard_id, "现在，你可以选择守护一位玩家，被守护的玩家今晚不会被刀，不能与上一晚守护同一名玩家。你的回复应当是一个纯数字x，x为你要守护的玩家编号，不要过多阐述，直接给出x", "guard", lambda text: parse_choice(text, legal), legal[0])
+
+    # 守卫行动结算：守护狼人的刀口时挡下刀口，刀口同时被女巫救下时仍然死亡（同守同救）
+    def guard_apply(self, answer):
+        self.speak(self.wake("guard") + "。") # 上帝语音播报
+        blocked = None
+        if answer is not None:
+            self.players[self.guard_id-1]["guarded"] = answer
+            if answer == self.night_kill:
+                blocked = self.will_death[0] == answer
+                self.will_death[0] = 0 if blocked else answer
+            self.store.publish(f"第{self.day}天夜晚，你守护了{answer}号玩家。", to=[self.guard_id], pinned=True)
+            self.emit("guard", answer, blocked)
+        # 刀口在守卫结算后才确定，此时记录狼人杀死的玩家（同守同救已在守卫的日志中说明）
+        if self.will_death[0] and blocked is None:
+            self.emit("night_kill", self.will_death[0])
+        self.announce("你要守护谁？") # 上帝语音播报
+        self.emit("set_up")
+
+    # 天亮，处理夜晚死亡，向各位玩家同步
+    def dawn(self):
+        self.emit("day")
+
+        if self.will_death[0] == 0 and self.will_death[1] == 0:
+            self.store.publish(f"天亮了，昨天是平安夜。（当前第{self.day}天白天）", kind="death")
+            self.speak("天亮了，昨天是平安夜。")
+        elif self.will_death[0] != 0 and (self.will_death[1] == 0 or self.will_death[0] == self.will_death[1]):
+            self.store.publish(f"天亮了，昨天{self.will_death[0]}号玩家死亡。（当前第{self.day}天白天）", kind="death")
+            self.speak(f"天亮了，昨天{self.will_death[0]}号玩家死亡。")
+            self.players[self.will_death[0]-1]["alive"] = False
+        elif self.will_death[0] != 0 and self.will_death[1] != 0:
+            self.store.publish(f"天亮了，昨天{self.will_death[0]}号玩家和{self.will_death[1]}号玩家死亡。（当前第{self.day}天白天）", kind="death")
+            self.speak(f"天亮了，昨天{self.will_death[0]}号玩家和{self.will_death[1]}号玩家死亡。")
+            self.players[self.will_death[0]-1]["alive"] = False
+            self.players[self.will_death[1]-1]["alive"] = False
+        self.emit("set_up")
+
+        # 若猎人夜晚仅被狼人所杀（女巫毒杀不能释放技能），等待开枪
+        self.shooter = 0
+        if self.will_death[0] != 0 and self.will_death[0] != self.will_death[1] and self.players[self.will_death[0]-1]["role"] == "猎人":
+            self.shooter = self.will_death[0]
+        # 第一晚死亡的玩家可发表遗言
+        self.dying = []
+        if self.day == 1:
+            self.dying = [id for id in dict.fromkeys(self.will_death) if id != 0]
+        # 夜晚死亡处理完成，检测游戏是否结束
+        self.check_game_over()
+
+    # 猎人开枪（夜晚被狼人杀死或白天被投票处决）
+    def hunter_action(self):
+        if self.shooter == 0:
+            return
+        shooter, self.shooter = self.shooter, 0
+        # 只能带走存活玩家，默认带走编号最小的存活玩家
+        legal = self.alive_ids(exclude = shooter)
+        answer = self.ask(shooter, "你作为猎人已经死亡，现在你可以选择一名玩家开枪将其带走。你的回复应当是一个纯数字x，x为你要开枪杀死的玩家编号，不要过多阐述，直接给出x", "hunter", lambda text: parse_choice(text, legal), legal[0])
+        self.emit("hunter", answer)
+        self.votes.append({"day": self.day, "kind": "hunter", "voter": shooter, "target": answer})
+        # 告知各位玩家结果并同步
+        self.store.publish(f"{shooter}号玩家身份为猎人，他选择开枪带走{answer}号玩家。", kind="death")
+        self.announce(f"{shooter}号玩家身份为猎人，他选择开枪带走{answer}号玩家。")
+        self.players[answer-1]["alive"] = False
+        self.emit("set_up")
+        # 猎人能发表遗言时，被带走的玩家随后也发表遗言
+        if shooter in self.dying:
+            self.dying.append(answer)
+        # 猎人带走玩家，检测游戏是否结束
+        self.check_game_over()
+
+    # 等待中的玩家依次发表遗言，上一名玩家的遗言播报时下一名玩家已开始生成
+    def last_words(self):
+        dying, self.dying = self.dying, []
+        previous = None
+        for id in dying:
+            previous = self.out_words(id, previous)
+        if previous:
+            previous.wait()
+
+    # 按一定顺序发言
+    def speeches(self):
+        self.store.publish(f"现在将按顺序进行发言。")
+        self.speak("现在将按顺序进行发言。")
+        # 发言流水线：上一名玩家的发言文本确定即同步，下一名玩家随即开始生成，同时上一名玩家的语音仍在播放
+        previous = None
+        for i in range(self.size):
+            id = (i + self.will_death[0]) % self.size + 1
+            # 每位存活玩家发言并向其他玩家同步
+            if self.players[id-1]["alive"]:
+                answer, speech = self.player_speech(id, "现在该你发言。你的所有输出都将同步给其他所有玩家，绝对不要出现内心活动和想法，不要在括号里表明自己的目的和行为。你的发言应当有利于自己的阵营走向胜利。你的回复应当尽量简短，200字即可。", "all_words", "speech", previous)
+                answer = answer.strip()
+                answer = re.sub(r'\([^)]*\)', '', answer) # 删除()内容，有时AI会有内心戏
+                self.store.publish(f"{id}号玩家发言如下：" + answer, kind="speech")
+                # 发送玩家发言
+                previous = self.present_speech("all_words", id, answer, speech, previous)
+        if previous:
+            previous.wait()
+        self.emit("set_up")
+
+    # 玩家投票
+    def day_vote(self):
+        all_votes = [{"id": i+1, "votes": 0} for i in range(self.size)]
+        all_results = []
+        give_up = 0
+        # 投票同时进行，互不可见，可并发；已翻牌的白痴不能投票，也不能再被投票
+        voters = [player for player in self.players if player["alive"] and not player.get("revealed")]
+        candidates = [player["id"] for player in voters]
+        # 只能投其他存活玩家或弃票，默认弃票
+        query = "现在，你必须给出今天想要投票的玩家。你的回复应当是一个纯数字x，x为你要投票出局的玩家编号，不要过度思考或过多阐述，直接给出一个纯数字x。如果弃票，请直接回复弃票，不要过多阐述。"
+        answers = self.gather(lambda player: self.ask(player["id"], query, "vote", lambda text: parse_choice(text, [id for id in candidates if id != player["id"]], ("弃票",)), "弃票"), voters)
+        for player, answer in zip(voters, answers):
+            self.votes.append({"day": self.day, "kind": "day", "voter": player["id"], "target": None if answer == "弃票" else answer})
+            if answer == "弃票":
+                give_up += 1
+                all_results.append([player["id"], answer])
+            else:
+                all_votes[answer-1]["votes"] += 1
+                all_results.append([player["id"], answer])
+        # 发送投票结果，同时上帝进行播报
+        self.emit("all_votes", all_results)
+        self.announce("发言结束，现在开始投票。")
+        # 同步投票信息
+        votes_info = ""
+        for one in all_results:
+            if one[1] == "弃票":
+                votes_info += f"{one[0]}号玩家弃票"
+            else:
+                votes_info += f"{one[0]}号玩家投票给{one[1]}号玩家"
+        self.store.publish("投票信息如下：" + votes_info, kind="vote")
+
+        # 解析得票最多的玩家ID，若平票或弃票过半作废
+        max_votes = max(one["votes"] for one in all_votes)
+        targets = [one["id"] for one in all_votes if one["votes"] == max_votes]
+        the_death = 0 if len(targets) > 1 else targets[0]
+        if give_up >= max_votes:
+            the_death = 0
+
+        self.shooter = 0
+        self.dying = []
+        if the_death != 0 and self.players[the_death-1]["role"] == "白痴":
+            # 白痴被处决时翻牌，免于出局，之后不能投票
+            self.players[the_death-1]["revealed"] = True
+            self.emit("idiot", the_death)
+            self.store.publish(f"{the_death}号玩家翻牌为白痴，免于出局，之后不能再投票。", kind="death")
+            self.announce(f"{the_death}号玩家翻牌为白痴，免于出局。")
+            the_death = 0
+        else:
+            # 发送结果并向所有玩家同步
+            self.emit("all_result", the_death)
+            day_result = f"{the_death}号玩家被投票处决。" if the_death != 0 else "平票或弃票过半，今天没有人被处决。"
+            self.store.publish(day_result, kind="death")
+            self.speak(day_result)
+        # 被处决的玩家发表遗言，若为猎人先开枪
+        if the_death != 0:
+            self.players[the_death-1]["alive"] = False
+            self.dying = [the_death]
+            if self.players[the_death-1]["role"] == "猎人":
+                self.shooter = the_death
+        self.emit("set_up")
+
+        # 玩家被投票处决检测游戏是否结束
+        self.check_game_over()
+
+    # 发表遗言，previous 为上一名玩家仍可能在播放的语音，返回本次遗言的语音
+    def out_words(self, id, previous = None):
+        # 上帝播报排在遗言语音之前
+        self.speak(f"请{id}号玩家发表遗言")
+        answer, speech = self.player_speech(id, "你已死亡，现在可以发表遗言。你的发言将会同步给在场所有玩家，不要出现内心潜台词和内心想法，你的遗言应当是有利于自己阵营的发言。", "all_words", "last_words", previous)
+        answer = answer.strip()
+        answer = re.sub(r'\([^)]*\)', '', answer) # 删除()内容，有时AI会有内心戏
+        # 玩家遗言同步给所有玩家并发送
+        self.store.publish(f"{id}号玩家遗言如下：" + answer, kind="speech")
+        previous = self.present_speech("all_words", id, answer, speech, previous)
+        # 更新UI
+        self.emit("set_up")
+        return previous
+
+    # 检查游戏是否结束
+    def check_game_over(self):
+        wolves = [p for p in self.players if p["role"] == "狼人" and p["alive"]]
+        villagers = [p for p in self.players if p["role"] == "平民" and p["alive"]]
+        gods = [p for p in self.players if p["role"] != "狼人" and p["role"] != "平民" and p["alive"]]
+        # 神职全死，狼人胜利（板子中没有神职或平民时不按该条件判定）
+        if not gods and any(role not in ("狼人", "平民") for role in self.roles):
+            self.game_over = True
+            self.winner = "狼人"
+        # 平民全死，狼人胜利
+        elif not villagers and "平民" in self.roles:
+            self.game_over = True
+            self.winner = "狼人"
+        # 狼人全死，有神职和平民存活，好人胜利
+        elif not wolves:
+            self.game_over = True
+            self.winner = "好人"
+
+    # 游戏结束，表现评分
+    def game_result(self):
+        # 游戏结束播报
+        self.emit("game_over")
+        self.speak(f"游戏结束！{self.winner}获胜！")
+        # 本局身份信息公开
+        role_info = ""
+        for i, role in enumerate(self.roles):
+            role_info += f"{i+1}号玩家 : {role}\n"
+        # 本局游戏日志公开，由结构化日志生成
+        game_log = self.log.render()
+        # 初始化投票
+        mvp_votes = [{"id": i+1, "votes": 0} for i in range(self.size)]
+        lvp_votes = [{"id": i+1, "votes": 0} for i in range(self.size)]
+        game_results = []
+
+        # 公开信息
+        self.store.publish(f"游戏结束，{self.winner}获胜！本局游戏所有玩家身份信息如下：{role_info}。整场游戏日志如下：{game_log}")
+        for player in self.players:
+            player["alive"] = True
+            if player["role"] == "女巫":
+                player["antidote"] = False
+                player["poison"] = False
+
+        # 玩家同时投票，按编号顺序统计
+        # 使用完整历史，回答仍不合法时该玩家的投票作废
+        legal = [player["id"] for player in self.players]
+        answers = self.gather(lambda player: self.ask(player["id"], "现在请你根据本场游戏的所有信息，投票选出本场游戏发挥最佳的玩家和发挥最差的玩家。你的输出应当严格遵照'x-y'的格式，其中x为你认为本场发挥最佳的玩家编号，y为你认为本场发挥最差的玩家编号。不要过多阐述，直接给出'x-y'，严格遵守'x-y'格式", "mvp", lambda text: parse_pair(text, legal), None, compact = False), self.players)
+        for i, answer in enumerate(answers):
+            if answer is None:
+                continue
+            mvp, lvp = answer
+            mvp_votes[mvp-1]["votes"] += 1
+            lvp_votes[lvp-1]["votes"] += 1
+            game_results.append([i+1, mvp, lvp])
+            self.votes.append({"day": self.day, "kind": "mvp", "voter": i+1, "target": mvp, "second": lvp})
+        # 发送结果并播报
+        self.emit("game_votes", game_results)
+        self.speak("请投票选出本场游戏的MVP和战犯。")
+        self.wait()
+
+        # 得出本局 mvp 和 lvp
+        max_mvp_votes = max(one["votes"] for one in mvp_votes)
+        max_lvp_votes = max(one["votes"] for one in lvp_votes)
+        targets = [one["id"] for one in mvp_votes if one["votes"] == max_mvp_votes]
+        mvp = self.choose(targets)
+        targets = [one["id"] for one in lvp_votes if one["votes"] == max_lvp_votes]
+        lvp = self.choose(targets)
+        # 胜负积分与 MVP 和战犯积分在最后一并结算，本环节中断后从断点重新进行不会重复计分
+        for i, player in enumerate(self.players):
+            if self.winner == "狼人" and player["role"] == "狼人":
+                self.points[i]["point"] += 10
+            elif self.winner == "好人" and player["role"] != "狼人":
+                self.points[i]["point"] += 10
+        self.points[mvp-1]["point"] += 5
+        self.points[lvp-1]["point"] -= 5
+        self.mvp, self.lvp = mvp, lvp
+        if self.results:
+            self.results.record(self.match_record())
+        self.emit("game_result", mvp, lvp)
+
+    # 本局结果：座位、模型、身份、胜负、本局得分、全部投票和各阶段耗时，格式与 ResultStore.record 一致
+    def match_record(self):
+        players = []
+        for i, player in enumerate(self.players):
+            win = (self.winner == "狼人") == (player["role"] == "狼人")
+            players.append({
+                "seat": player["id"],
+                "name": self.agents[i]["name"],
+                "model": self.agents[i]["model"],
+                "role": player["role"],
+                "win": win,
+                "point": 10 * win + 5 * (player["id"] == self.mvp) - 5 * (player["id"] == self.lvp),
+                "mvp": player["id"] == self.mvp,
+                "lvp": player["id"] == self.lvp
+            })
+        return {
+            "played_at": datetime.now().isoformat(timespec="seconds"),
+            "winner": self.winner,
+            "days": self.day,
+            "mvp": self.mvp,
+            "lvp": self.lvp,
+            "players": players,
+            "votes": self.votes,
+            "timings": [{"day": timing["day"], "phase": timing["phase"], "seconds": timing["seconds"]} for timing in self.timings if timing["match"] == self.match]
+        }
+
+# 无界面运行入口：仅输出游戏日志和积分
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI狼人杀锦标赛（无界面模式）")
+    parser.add_argument("-n", "--matchs", type=int, default=1, help="比赛总轮次")
+    parser.add_argument("-w", "--workers", type=int, default=9, help="并发决策数，1为依次串行")
+    parser.add_argument("--context-budget", type=int, default=None, help="每个智能体的上下文令牌预算")
+    parser.add_argument("--checkpoint", default=None, help="断点文件，每个阶段结束后保存，文件已存在时从断点继续")
+    parser.add_argument("--record", default=None, help="将全部大模型回答和随机结果记录到 JSONL 文件")
+    parser.add_argument("--replay", default=None, help="按 JSONL 记录全速回放，不请求大模型")
+    parser.add_argument("--base-url", default=None, help="全部大模型改用该服务地址，例如本地模拟服务 http://127.0.0.1:8000/v1")
+    parser.add_argument("--trace", default=None, help="将每个阶段和每次大模型请求的追踪记录写入 JSONL 文件")
+    parser.add_argument("--metrics", default=None, help="定期写入 Prometheus 文本格式的指标文件")
+    parser.add_argument("--pool-size", type=int, default=None, help="每个服务商客户端的最大连接数")
+    parser.add_argument("--timeout", type=float, default=None, help="大模型请求超时秒数")
+    parser.add_argument("--full-decisions", action="store_true", help="查验、投票等决策也发送完整对话历史（默认只发送局势摘要）")
+    parser.add_argument("--results", default=None, help="结果库路径（SQLite），每局结束后写入结果并更新等级分")
+    parser.add_argument("--log", default=GAME_LOG_PATH, help="结构化游戏日志（JSONL，按大小轮换）")
+    parser.add_argument("--board", default="9人预女猎", choices=list(BOARDS), help="板子（身份组成）")
+    parser.add_argument("--roles", default=None, help="自定义身份组成，逗号分隔，例如 狼人,狼人,狼人,狼人,平民,平民,平民,预言家,女巫,猎人，指定时忽略 --board")
+    args = parser.parse_args()
+    configure_clients(max_connections=args.pool_size, timeout=args.timeout)
+
+    agents = with_base_url(EXAMPLE_AGENTS, args.base_url) if args.base_url else None
+    telemetry = Telemetry(args.trace, args.metrics)
+    engine = WerewolfEngine(matchs=args.matchs, agents=agents, max_workers=args.workers, context_budget=args.context_budget, checkpoint=args.checkpoint, record=args.record, replay=args.replay, telemetry=telemetry, compact_decisions=not args.full_decisions, results=args.results, log=args.log, board=args.roles.split(",") if args.roles else BOARDS[args.board])
+
+    # 打印游戏日志
+    def print_event(event):
+        line = describe_event(event, engine)
+        if line:
+            print(line, flush=True)
+        elif event[0] == "game_result":
+            print(f"第 {engine.match} 局 MVP: {event[1]}号  战犯: {event[2]}号", flush=True)
+    engine.listener = print_event
+
+    try:
+        points = engine.run()
+    finally:
+        engine.log.close()
+        if engine.results:
+            engine.results.close()
+        telemetry.close()
+        close_clients()
+    # 积分一览
+    for one in sorted(points, key=lambda x: x["point"], reverse=True):
+        print(f"{engine.agents[one['id']-1]['name']} : {one['point']}")
+    # 最后一局的上下文统计
+    for player in engine.players:
+        stats = player["Agent"].context.stats
+        print(f"{player['name']} : 请求 {stats['calls']} 次，平均 {stats['prompt_tokens'] // max(stats['calls'], 1)} 令牌，峰值 {stats['peak_tokens']} 令牌，压缩 {stats['compactions']} 次")
+    # 最后一局各阶段的用量与前缀缓存命中情况
+    records = [record for player in engine.players for record in player["Agent"].usage]
+    for phase, row in summarize_usage(records).items():
+        rate = row["cached_tokens"] / row["prompt_tokens"] if row["prompt_tokens"] else 0
+        print(f"{phase} : 请求 {row['calls']} 次，输入 {row['prompt_tokens']} 令牌，缓存命中 {rate:.0%}，平均耗时 {row['latency'] / row['calls']:.2f} 秒，前缀变化 {row['prefix_breaks']} 次")
@@ -0,0 +1,51 @@
+import threading
+
+# 游戏事件库：全局唯一、只追加的事件记录，所有玩家共享同一份文本
+# 每条事件包含序号、天数、文本、可见范围（None 为全体可见，否则为可见玩家编号）、是否为私有信息以及事件类别
+class EventStore:
+    def __init__(self):
+        self.events = []
+        self.day = 1
+        self.lock = threading.Lock()
+
+    # 发布一条事件，to 为可见玩家编号列表，pinned 为 True 的私有信息在压缩上下文时逐字保留
+    # kind 为事件类别（death 死亡、vote 投票、speech 发言、wolf_chat 狼人讨论），用于生成决策时的局势摘要
+    def publish(self, text, to = None, pinned = False, kind = None):
+        with self.lock:
+            self.events.append({
+                "seq": len(self.events),
+                "day": self.day,
+                "text": text,
+                "to": None if to is None else tuple(to),
+                "pinned": pinned,
+                "kind": kind
+            })
+
+    @staticmethod
+    def visible(event, id):
+        return event["to"] is None or id in event["to"]
+
+    # 玩家 id 从 start 开始可见的事件序号，返回 (序号列表, 新的读取位置)
+    def pending(self, id, start):
+        with self.lock:
+            end = len(self.events)
+            return [seq for seq in range(start, end) if self.visible(self.events[seq], id)], end
+
+    # 多条事件合并为一条消息文本
+    def render(self, seqs):
+        return "\n".join(self.events[seq]["text"] for seq in seqs)
+
+    # 保存与恢复事件库，用于断点续跑
+    def state(self):
+        with self.lock:
+            return {"day": self.day, "events": [dict(event, to=None if event["to"] is None else list(event["to"])) for event in self.events]}
+
+    def load_state(self, state):
+        with self.lock:
+            self.day = state["day"]
+            self.events = [dict(event, to=None if event["to"] is None else tuple(event["to"])) for event in state["events"]]
+
+    # 查询玩家 id 在第 seq 条事件发生时已知的全部信息
+    def knowledge(self, id, seq):
+        with self.lock:
+            return [event for event in self.events[:seq+1] if self.visible(event, id)]
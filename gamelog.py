@@ -0,0 +1,89 @@
+import os
+import json
+import threading
+from datetime import datetime
+
+# 结构化游戏日志：引擎的每个游戏事件写入一行 JSON（时间、局数、天数、事件类型、参数和日志文本）
+# 写入先进入缓冲区，每个阶段结束时刷新并 fsync，文件超过 max_bytes 时轮换为 .1、.2 ……，最多保留 backups 个旧文件
+# 本局的记录同时保留在内存中，游戏结束时交给智能体的整场游戏日志由此生成，不依赖界面
+
+# 默认的游戏日志路径
+GAME_LOG_PATH = os.path.join("logs", "game.jsonl")
+
+# 只用于界面刷新的事件，不写入日志
+SKIPPED_EVENTS = ("set_up",)
+
+class GameLog:
+    def __init__(self, path = None, max_bytes = 10 * 1024 * 1024, backups = 5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.lock = threading.Lock()
+        # 本局的全部记录
+        self.records = []
+        self.file = None
+        if path:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.file = open(path, "a", encoding="utf-8", buffering=64 * 1024)
+
+    # 开始新的一局，清空本局记录
+    def start(self, match, players):
+        with self.lock:
+            self.records = []
+        self.write({"match": match, "day": 1, "event": "game_start", "args": [players], "text": None})
+
+    # 记录一个游戏事件，text 为 describe_event 生成的日志文本（可为 None）
+    def event(self, match, day, event, text):
+        if event[0] in SKIPPED_EVENTS or event[0].endswith("_partial"):
+            return
+        self.write({"match": match, "day": day, "event": event[0], "args": list(event[1:]), "text": text})
+
+    def write(self, record):
+        record = {"time": datetime.now().isoformat(timespec="milliseconds"), **record}
+        with self.lock:
+            self.records.append(record)
+            if self.file:
+                self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    # 本局的游戏日志文本
+    def render(self):
+        with self.lock:
+            return "\n".join(record["text"] for record in self.records if record["text"])
+
+    # 阶段结束：缓冲区写入磁盘并 fsync，超过大小上限时轮换
+    def sync(self):
+        with self.lock:
+            if not self.file:
+                return
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            if self.file.tell() >= self.max_bytes:
+                self.rotate()
+
+    def rotate(self):
+        self.file.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i+1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.file = open(self.path, "a", encoding="utf-8", buffering=64 * 1024)
+
+    # 保存与恢复本局记录，用于断点续跑
+    def state(self):
+        with self.lock:
+            return list(self.records)
+
+    def load_state(self, records):
+        with self.lock:
+            self.records = list(records)
+
+    def close(self):
+        self.sync()
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
@@ -0,0 +1,267 @@
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from context import count_tokens, count_messages
+
+# 本地模拟大模型服务，兼容 OpenAI 的 /chat/completions 接口，用于离线压测引擎、并发和界面
+# 根据提问类型给出符合规则的回答，并按各模型的延迟分布等待，可注入错误和超时
+
+# 各模型的延迟分布：latency 为首个令牌的中位耗时（秒，对数正态分布），sigma 为离散程度，speed 为每秒输出字符数
+# error_rate 为返回 429/500/503 的概率，timeout_rate 为长时间不响应的概率
+PROFILES = {
+    "default": {"latency": 1.5, "sigma": 0.4, "speed": 60, "error_rate": 0.0, "timeout_rate": 0.0},
+    "doubao-1-5-pro-32k-character-250228": {"latency": 0.8, "sigma": 0.3, "speed": 80},
+    "meta-llama/llama-4-maverick:free": {"latency": 2.5, "sigma": 0.8, "speed": 50, "error_rate": 0.03},
+    "gemini-2.0-flash": {"latency": 0.5, "sigma": 0.3, "speed": 150},
+    "deepseek-chat": {"latency": 1.5, "sigma": 0.5, "speed": 40},
+    "x1": {"latency": 6.0, "sigma": 0.6, "speed": 30},
+    "kimi-latest": {"latency": 1.2, "sigma": 0.4, "speed": 60},
+    "qwen-max-latest": {"latency": 1.0, "sigma": 0.4, "speed": 50},
+    "deepseek-reasoner": {"latency": 8.0, "sigma": 0.5, "speed": 30},
+    "gpt-3.5-turbo-0125": {"latency": 0.6, "sigma": 0.6, "speed": 80, "error_rate": 0.02, "timeout_rate": 0.01},
+}
+
+# 模拟发言的素材
+SPEECH = [
+    "我是好人，昨晚没有什么信息。",
+    "我觉得{x}号玩家的发言有些问题，逻辑前后不太一致。",
+    "{x}号玩家刚才的发言很像狼人，建议大家重点关注。",
+    "我暂时相信{x}号玩家，他的视角比较像好人。",
+    "今天我会把票投给{x}号玩家。",
+    "请预言家尽快站出来报查验，带领好人走出正确的方向。",
+    "大家不要被带节奏，先听完所有人的发言再做判断。",
+    "(我要隐藏自己的身份)",
+]
+
+# 从对话中解析本局信息：玩家人数、自己的编号、狼队友以及已死亡的玩家
+def read_table(messages):
+    system = messages[0]["content"] if messages and messages[0]["role"] == "system" else ""
+    size = re.search(r"由(\d+)名玩家", system)
+    size = int(size.group(1)) if size else 9
+    seat = re.search(r"你在本局游戏中为(\d+)号玩家", system)
+    seat = int(seat.group(1)) if seat else 0
+    mates = re.search(r"你的狼队友是：([\d, ]*)号玩家", system)
+    mates = [int(x) for x in re.findall(r"\d+", mates.group(1))] if mates else []
+    dead = set()
+    for message in messages[1:]:
+        text = message["content"]
+        for one in re.findall(r"(\d+)号玩家(?:和(\d+)号玩家)?死亡", text):
+            dead.update(int(x) for x in one if x)
+        dead.update(int(x) for x in re.findall(r"(\d+)号玩家被投票处决", text))
+        dead.update(int(x) for x in re.findall(r"开枪带走(\d+)号玩家", text))
+    alive = [id for id in range(1, size+1) if id not in dead]
+    return size, seat, mates, alive
+
+# 根据提问类型生成符合规则的回答
+def reply(messages, rng):
+    # 提问在最后一行（决策请求的局势摘要在提问之前）
+    query = messages[-1]["content"].split("\n")[-1]
+    size, seat, mates, alive = read_table(messages)
+    others = [id for id in alive if id != seat] or alive or [1]
+    if "救/不救" in query:
+        return rng.choice(["救", "不救"])
+    if "不用" in query:
+        return str(rng.choice(others)) if rng.random() < 0.3 else "不用"
+    if "x-y" in query:
+        mvp, lvp = rng.sample(range(1, size+1), 2)
+        return f"{mvp}-{lvp}"
+    if "弃票" in query:
+        return "弃票" if rng.random() < 0.1 else str(rng.choice(others))
+    if "纯数字" in query:
+        # 狼人不投自己的队友
+        if "狼人" in query:
+            return str(rng.choice([id for id in others if id not in mates] or others))
+        return str(rng.choice(others))
+    # 自由发言
+    return "".join(rng.choice(SPEECH).format(x=rng.choice(others)) for _ in range(rng.randint(3, 6)))
+
+class MockHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 长连接，流式输出使用分块传输
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body, headers = None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self.send_json(200, {"object": "list", "data": [{"id": model, "object": "model"} for model in PROFILES if model != "default"]})
+        else:
+            self.send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_json(404, {"error": {"message": "not found"}})
+            return
+        server = self.server
+        model = request.get("model", "default")
+        profile = server.profile(model)
+        rng = server.rng()
+
+        # 注入超时和错误
+        if rng.random() < profile["timeout_rate"]:
+            time.sleep(server.hang)
+        if rng.random() < profile["error_rate"]:
+            status = rng.choice([429, 500, 503])
+            server.count("errors")
+            self.send_json(status, {"error": {"message": "injected error", "type": "mock_error", "code": status}}, {"Retry-After": "1"} if status == 429 else None)
+            return
+
+        messages = request.get("messages", [])
+        answer = reply(messages, rng)
+        if (request.get("response_format") or {}).get("type") == "json_object":
+            answer = json.dumps({"answer": answer}, ensure_ascii=False)
+        max_tokens = request.get("max_tokens")
+        if max_tokens:
+            answer = answer[:max_tokens]
+        usage = {
+            "prompt_tokens": count_messages(messages),
+            "completion_tokens": count_tokens(answer),
+            "prompt_tokens_details": {"cached_tokens": server.cached_tokens(messages)},
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        first = rng.lognormvariate(0, profile["sigma"]) * profile["latency"] * server.scale
+        per_char = server.scale / profile["speed"]
+        server.count("requests")
+        base = {"id": f"mock-{rng.getrandbits(32):08x}", "created": int(time.time()), "model": model}
+
+        if not request.get("stream"):
+            time.sleep(first + per_char * len(answer))
+            self.send_json(200, {**base, "object": "chat.completion", "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}], "usage": usage})
+            return
+
+        # 流式输出：Server-Sent Events，每段几个字符
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(first)
+        def event(choices, usage = None):
+            body = {**base, "object": "chat.completion.chunk", "choices": choices}
+            if usage:
+                body["usage"] = usage
+            self.send_chunk(b"data: " + json.dumps(body, ensure_ascii=False).encode("utf-8") + b"\n\n")
+        for i in range(0, len(answer), 4):
+            part = answer[i:i+4]
+            event([{"index": 0, "delta": {"content": part}, "finish_reason": None}])
+            time.sleep(per_char * len(part))
+        event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if (request.get("stream_options") or {}).get("include_usage"):
+            event([], usage)
+        # 结束标记与分块传输的结尾一次写出，客户端读到 [DONE] 时响应已完整，连接可复用
+        data = b"data: [DONE]\n\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n0\r\n\r\n")
+        self.wfile.flush()
+
+# 模拟服务，可在后台线程中启动（用于压测和基准测试），也可独立运行
+# scale 为延迟缩放比例（0 为不等待），profiles 覆盖默认的延迟分布，hang 为注入超时时的等待秒数
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host = "127.0.0.1", port = 0, scale = 1.0, profiles = None, error_rate = None, timeout_rate = None, hang = 600, seed = None):
+        super().__init__((host, port), MockHandler)
+        self.scale = scale
+        self.profiles = {**PROFILES, **(profiles or {})}
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.hang = hang
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        # 模拟服务商的前缀缓存：记录见过的消息前缀
+        self.prefixes = set()
+        self.stats = {"requests": 0, "errors": 0}
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/v1"
+
+    # 模型的延迟分布，未配置的项取默认值，命令行指定的错误率和超时率覆盖全部模型
+    def profile(self, model):
+        profile = {**self.profiles["default"], **self.profiles.get(model, {})}
+        if self.error_rate is not None:
+            profile["error_rate"] = self.error_rate
+        if self.timeout_rate is not None:
+            profile["timeout_rate"] = self.timeout_rate
+        return profile
+
+    # 每个请求使用独立的随机数生成器，避免多线程共用
+    def rng(self):
+        with self.lock:
+            return random.Random(self.random.getrandbits(64))
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    # 与之前请求相同的最长消息前缀的令牌数
+    def cached_tokens(self, messages):
+        cached = 0
+        tokens = 0
+        key = None
+        with self.lock:
+            if len(self.prefixes) > 100000:
+                self.prefixes.clear()
+            for message in messages:
+                key = hash((key, message["role"], message["content"]))
+                tokens += count_messages([message])
+                if key in self.prefixes:
+                    cached = tokens
+                self.prefixes.add(key)
+        return cached
+
+    # 客户端主动断开（超时或取消请求）不视为服务错误
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], (ConnectionError, TimeoutError)):
+            return
+        super().handle_error(request, client_address)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地模拟大模型服务（兼容 OpenAI 接口）")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--scale", type=float, default=1.0, help="延迟缩放比例，0 为不等待")
+    parser.add_argument("--profiles", default=None, help="JSON 文件，按模型名覆盖延迟分布")
+    parser.add_argument("--error-rate", type=float, default=None, help="全部模型返回错误的概率")
+    parser.add_argument("--timeout-rate", type=float, default=None, help="全部模型长时间不响应的概率")
+    parser.add_argument("--hang", type=float, default=600, help="注入超时时的等待秒数")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    profiles = None
+    if args.profiles:
+        with open(args.profiles, encoding="utf-8") as f:
+            profiles = json.load(f)
+    server = MockServer(args.host, args.port, args.scale, profiles, args.error_rate, args.timeout_rate, args.hang, args.seed)
+    print(f"模拟服务已启动：{server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
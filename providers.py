@@ -0,0 +1,171 @@
+import os
+import time
+import random
+import threading
+from collections import deque
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from openai import APIConnectionError, APITimeoutError, APIStatusError
+
+# 各服务商（按服务地址的主机名）的调度设置，未列出的服务商使用 default
+# rate 为每秒请求数（令牌桶，None 为不限制），burst 为令牌桶容量，concurrency 为最大并发请求数
+# retries 为最多重试次数，backoff 与 max_backoff 为指数退避的初始与最大等待秒数（带随机抖动）
+# hedge 为是否对简短的决策请求进行对冲：请求耗时超过同一模型近期决策请求耗时的 hedge_quantile 分位数后，再发出一个相同的请求，取先完成的结果
+PROVIDER_SETTINGS = {
+    "default": {"rate": None, "burst": 1, "concurrency": 8, "retries": 4, "backoff": 1.0, "max_backoff": 30.0, "hedge": True, "hedge_quantile": 0.95, "min_samples": 20},
+    # openrouter 免费模型每分钟约20次请求
+    "openrouter.ai": {"rate": 0.3, "burst": 3, "concurrency": 2},
+    # 免费 GPT-3.5 镜像
+    "free.v36.cm": {"rate": 1.0, "burst": 2, "concurrency": 2},
+}
+# 多进程同时比赛时，每个进程分得的请求速率比例
+_share = 1.0
+
+# 修改调度设置（之后新建的调度器生效），share 为本进程分得的速率比例
+def configure_providers(share = None, **settings):
+    global _share
+    if share is not None:
+        _share = share
+    for host, values in settings.items():
+        PROVIDER_SETTINGS.setdefault(host, {}).update(values)
+
+# 可重试的错误：连接错误、超时、429 和 5xx
+def retryable(error):
+    if isinstance(error, (APIConnectionError, APITimeoutError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+# 服务端通过 Retry-After 指定的等待秒数
+def retry_after(error):
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+# 令牌桶限速
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+# 单个服务商的请求调度：限速、限制并发、失败重试（指数退避加抖动）以及对冲请求
+class Provider:
+    def __init__(self, host):
+        self.host = host
+        self.settings = {**PROVIDER_SETTINGS["default"], **PROVIDER_SETTINGS.get(host, {})}
+        rate = self.settings["rate"]
+        self.bucket = TokenBucket(rate * _share, self.settings["burst"]) if rate else None
+        self.semaphore = threading.BoundedSemaphore(self.settings["concurrency"])
+        # 各模型近期成功的决策请求耗时，用于计算对冲等待时间（发言等较长的请求不计入，同一服务商的不同模型分开统计）
+        self.latencies = {}
+        self.lock = threading.Lock()
+
+    # 进行一次请求：等待限速令牌并占用一个并发名额，model 不为 None 时把耗时计入该模型的决策耗时
+    def attempt(self, func, model = None):
+        if self.bucket:
+            self.bucket.acquire()
+        with self.semaphore:
+            start = time.perf_counter()
+            result = func()
+            if model is not None:
+                with self.lock:
+                    self.latencies.setdefault(model, deque(maxlen=200)).append(time.perf_counter() - start)
+            return result
+
+    # 对冲等待时间：该模型近期决策耗时的分位数，样本不足时不对冲
+    def hedge_delay(self, model):
+        with self.lock:
+            latencies = self.latencies.get(model, ())
+            if len(latencies) < self.settings["min_samples"]:
+                return None
+            values = sorted(latencies)
+        return values[min(len(values) - 1, int(self.settings["hedge_quantile"] * len(values)))]
+
+    # 进行请求，可重试的错误按指数退避重试；can_retry 返回 False 时（例如流式输出已推送部分文本）不再重试
+    # hedge 为 True 表示简短的决策请求，其耗时计入 model 的决策耗时，并可进行对冲
+    # 返回 (结果, 重试次数, 是否发出了对冲请求)
+    def call(self, func, hedge = False, can_retry = None, model = None):
+        retries = 0
+        sample = model if hedge else None
+        while True:
+            try:
+                if hedge and self.settings["hedge"]:
+                    result, hedged = self.hedged(func, sample)
+                else:
+                    result, hedged = self.attempt(func, sample), False
+                return result, retries, hedged
+            except Exception as e:
+                if retries >= self.settings["retries"] or not retryable(e) or (can_retry and not can_retry()):
+                    raise
+                retries += 1
+                delay = retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0.5, 1) * min(self.settings["max_backoff"], self.settings["backoff"] * 2 ** (retries - 1))
+                time.sleep(delay)
+
+    # 对冲请求：第一个请求超过等待时间仍未完成时再发出一个，取先成功的结果
+    def hedged(self, func, model):
+        delay = self.hedge_delay(model)
+        if delay is None:
+            return self.attempt(func, model), False
+        first = _executor().submit(self.attempt, func, model)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result(), False
+        second = _executor().submit(self.attempt, func, model)
+        futures = [first, second]
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                futures.remove(future)
+                if future.exception() is None or not futures:
+                    # 较慢的请求不再等待，其结果被丢弃
+                    return future.result(), True
+
+_providers = {}
+_providers_lock = threading.Lock()
+_providers_pid = os.getpid()
+_pool = None
+
+# 对冲请求使用的线程池
+def _executor():
+    global _pool
+    with _providers_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+        return _pool
+
+# 按服务地址取得服务商调度器，同一进程中的全部智能体和比赛共用，子进程（fork）重新创建
+def get_provider(base_url):
+    global _providers_pid, _pool
+    host = urlparse(base_url).hostname or base_url
+    with _providers_lock:
+        if _providers_pid != os.getpid():
+            _providers.clear()
+            _pool = None
+            _providers_pid = os.getpid()
+        provider = _providers.get(host)
+        if provider is None:
+            provider = Provider(host)
+            _providers[host] = provider
+        return provider
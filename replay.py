@@ -0,0 +1,72 @@
+import json
+import threading
+from time import sleep
+from collections import deque
+
+# 记录一次游戏过程：每行一条 JSON 记录
+# meta 为比赛设置，roles 为身份分配，choice 为平票时的随机选择，chat 为智能体的一次请求与回答，speech 为语音播报文本
+class Recorder:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        # 行缓冲，程序中断时已记录的内容不会丢失
+        self.file = open(path, "w", encoding="utf-8", buffering=1)
+
+    def write(self, kind, **data):
+        line = json.dumps({"type": kind, **data}, ensure_ascii=False)
+        with self.lock:
+            self.file.write(line + "\n")
+
+    def close(self):
+        self.file.close()
+
+# 回放记录：按记录顺序交还身份分配、随机选择和各玩家的回答，不再请求大模型
+# realtime 为 True 时按记录的耗时等待（流式发言按耗时分段推送），用于界面观看；否则全速运行
+class Replayer:
+    def __init__(self, path, realtime=False):
+        self.path = path
+        self.realtime = realtime
+        self.meta = {}
+        self.records = {"roles": deque(), "choice": deque()}
+        # 同一玩家的请求总是依次进行，按玩家编号分别排队，并发请求的完成顺序不影响回放
+        self.chats = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record["type"] == "meta":
+                    self.meta = record
+                elif record["type"] == "chat":
+                    self.chats.setdefault(record["seat"], deque()).append(record)
+                elif record["type"] in self.records:
+                    self.records[record["type"]].append(record)
+
+    # 取出下一条 roles 或 choice 记录
+    def next(self, kind):
+        if not self.records[kind]:
+            raise RuntimeError(f"回放记录 {self.path} 中的 {kind} 记录已用完")
+        return self.records[kind].popleft()
+
+    # 交还 seat 号玩家的下一条回答，提问与记录不一致时提示回放已偏离记录
+    def replay(self, seat, query, on_text=None):
+        chats = self.chats.get(seat)
+        if not chats:
+            raise RuntimeError(f"回放记录 {self.path} 中 {seat} 号玩家的回答已用完")
+        record = chats.popleft()
+        if record["query"] != query:
+            print(f"回放偏离记录：{seat} 号玩家的提问与记录不一致")
+        answer = record["answer"]
+        if on_text is None:
+            if self.realtime:
+                sleep(record["latency"])
+            return answer
+        # 流式发言分段推送
+        size = 8
+        parts = [answer[i:i+size] for i in range(0, len(answer), size)] or [""]
+        for part in parts:
+            if self.realtime:
+                sleep(record["latency"] / len(parts))
+            if part:
+                on_text(part)
+        return answer
@@ -0,0 +1,178 @@
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+
+# 比赛结果库：嵌入式 SQLite，每局结束后增量写入座位、身份、胜负、全部投票、MVP/战犯和各阶段耗时
+# 同时维护 Elo 等级分：每局为好人阵营与狼人阵营的对局，按两个阵营的平均等级分计算期望胜率，阵营内每位玩家按同样的分差更新
+# 排行榜查询走索引，无需重新读取日志
+
+# 默认的结果库路径
+RESULTS_PATH = "results.db"
+# Elo 初始分与每局的最大变化
+INITIAL_RATING = 1500.0
+K_FACTOR = 24.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    source TEXT,
+    game INTEGER,
+    played_at TEXT NOT NULL,
+    winner TEXT NOT NULL,
+    days INTEGER,
+    mvp INTEGER,
+    lvp INTEGER,
+    UNIQUE (source, game)
+);
+CREATE TABLE IF NOT EXISTS seats (
+    match_id INTEGER NOT NULL REFERENCES matches(id),
+    seat INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    model TEXT,
+    role TEXT NOT NULL,
+    win INTEGER NOT NULL,
+    point INTEGER NOT NULL,
+    mvp INTEGER NOT NULL,
+    lvp INTEGER NOT NULL,
+    rating_before REAL,
+    rating_after REAL,
+    PRIMARY KEY (match_id, seat)
+);
+CREATE TABLE IF NOT EXISTS votes (
+    match_id INTEGER NOT NULL REFERENCES matches(id),
+    day INTEGER,
+    kind TEXT NOT NULL,
+    voter INTEGER NOT NULL,
+    target INTEGER,
+    second INTEGER
+);
+CREATE TABLE IF NOT EXISTS timings (
+    match_id INTEGER NOT NULL REFERENCES matches(id),
+    day INTEGER,
+    phase TEXT NOT NULL,
+    seconds REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ratings (
+    name TEXT PRIMARY KEY,
+    rating REAL NOT NULL,
+    games INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS seats_name ON seats (name, role);
+CREATE INDEX IF NOT EXISTS seats_role ON seats (role, name);
+CREATE INDEX IF NOT EXISTS seats_model ON seats (model);
+CREATE INDEX IF NOT EXISTS matches_played_at ON matches (played_at);
+CREATE INDEX IF NOT EXISTS votes_match ON votes (match_id);
+CREATE INDEX IF NOT EXISTS timings_phase ON timings (phase, match_id);
+"""
+
+# 阵营的期望得分
+def expected(rating, opponent):
+    return 1 / (1 + 10 ** ((opponent - rating) / 400))
+
+class ResultStore:
+    def __init__(self, path = RESULTS_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        # 游戏线程写入、界面线程查询，共用一个连接并加锁
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    # 写入一局结果（WerewolfEngine.match_record 的格式）并更新等级分，同一事务中完成
+    # source 与 game 相同的对局只写入一次（例如锦标赛断点续跑时重复交回的结果），返回是否写入
+    def record(self, match):
+        with self.lock, self.db:
+            cursor = self.db.execute(
+                "INSERT OR IGNORE INTO matches (source, game, played_at, winner, days, mvp, lvp) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (match.get("source"), match.get("game"), match.get("played_at") or datetime.now().isoformat(timespec="seconds"), match["winner"], match.get("days"), match.get("mvp"), match.get("lvp"))
+            )
+            if cursor.rowcount == 0:
+                return False
+            match_id = cursor.lastrowid
+            players = match["players"]
+            before = {player["name"]: self.rating(player["name"]) for player in players}
+            after = self.rate(players, before)
+            self.db.executemany(
+                "INSERT INTO seats (match_id, seat, name, model, role, win, point, mvp, lvp, rating_before, rating_after) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(match_id, player["seat"], player["name"], player.get("model"), player["role"], int(player["win"]), player["point"], int(player["mvp"]), int(player["lvp"]), before[player["name"]], after[player["name"]]) for player in players]
+            )
+            self.db.executemany(
+                "INSERT INTO votes (match_id, day, kind, voter, target, second) VALUES (?, ?, ?, ?, ?, ?)",
+                [(match_id, vote.get("day"), vote["kind"], vote["voter"], vote.get("target"), vote.get("second")) for vote in match.get("votes", [])]
+            )
+            self.db.executemany(
+                "INSERT INTO timings (match_id, day, phase, seconds) VALUES (?, ?, ?, ?)",
+                [(match_id, timing.get("day"), timing["phase"], timing["seconds"]) for timing in match.get("timings", [])]
+            )
+            self.db.executemany(
+                "INSERT INTO ratings (name, rating, games) VALUES (?, ?, 1) ON CONFLICT(name) DO UPDATE SET rating = excluded.rating, games = games + 1",
+                list(after.items())
+            )
+            return True
+
+    def rating(self, name):
+        row = self.db.execute("SELECT rating FROM ratings WHERE name = ?", (name,)).fetchone()
+        return row["rating"] if row else INITIAL_RATING
+
+    # 阵营 Elo：好人阵营与狼人阵营各取平均等级分，胜方得1分
+    @staticmethod
+    def rate(players, before):
+        teams = {}
+        for player in players:
+            teams.setdefault(player["role"] == "狼人", []).append(player)
+        average = {wolf: sum(before[player["name"]] for player in team) / len(team) for wolf, team in teams.items()}
+        after = dict(before)
+        if len(teams) < 2:
+            return after
+        for wolf, team in teams.items():
+            change = K_FACTOR * (int(team[0]["win"]) - expected(average[wolf], average[not wolf]))
+            for player in team:
+                after[player["name"]] = before[player["name"]] + change
+        return after
+
+    # 排行榜：可按身份、模型和起始日期筛选，按等级分排序
+    def leaderboard(self, role = None, model = None, since = None):
+        where = []
+        args = []
+        if role:
+            where.append("s.role = ?")
+            args.append(role)
+        if model:
+            where.append("s.model = ?")
+            args.append(model)
+        if since:
+            where.append("m.played_at >= ?")
+            args.append(since)
+        query = f"""
+            SELECT s.name, COUNT(*) AS games, SUM(s.point) AS point, SUM(s.win) AS wins, SUM(s.mvp) AS mvp, SUM(s.lvp) AS lvp,
+                   COALESCE(r.rating, {INITIAL_RATING}) AS rating
+            FROM seats s JOIN matches m ON m.id = s.match_id LEFT JOIN ratings r ON r.name = s.name
+            {"WHERE " + " AND ".join(where) if where else ""}
+            GROUP BY s.name ORDER BY rating DESC, point DESC
+        """
+        with self.lock:
+            return [dict(row) for row in self.db.execute(query, args)]
+
+    # 各阶段的平均耗时
+    def phase_timings(self):
+        with self.lock:
+            return [dict(row) for row in self.db.execute("SELECT phase, COUNT(*) AS count, AVG(seconds) AS mean FROM timings GROUP BY phase ORDER BY mean DESC")]
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+# 查看排行榜
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI狼人杀历史排行榜")
+    parser.add_argument("--results", default=RESULTS_PATH, help="结果库路径")
+    parser.add_argument("--role", default=None, help="只统计该身份的对局，例如 狼人")
+    parser.add_argument("--model", default=None, help="只统计该模型")
+    parser.add_argument("--since", default=None, help="只统计该日期之后的对局，例如 2025-01-01")
+    args = parser.parse_args()
+    store = ResultStore(args.results)
+    for one in store.leaderboard(args.role, args.model, args.since):
+        print(f"{one['name']} : 等级分 {one['rating']:.0f}  积分 {one['point']}  {one['games']}局  胜 {one['wins']}  MVP {one['mvp']}次  战犯 {one['lvp']}次")
+    store.close()
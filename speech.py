@@ -0,0 +1,221 @@
+import io
+import os
+import json
+import time
+import pygame
+import asyncio
+import hashlib
+import argparse
+import threading
+from queue import Queue
+from edge_tts import Communicate, VoicesManager
+from telemetry import Telemetry
+
+# 默认语音缓存目录
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "cache", "tts")
+
+# 磁盘语音缓存，以 (文本, 音色, 语速) 的哈希为键，总大小超过上限时按最近使用时间淘汰
+class AudioCache:
+    def __init__(self, directory = CACHE_DIR, max_bytes = 200 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # 统计现有缓存大小
+        self.size = sum(os.path.getsize(path) for path in self.files())
+
+    def files(self):
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".mp3")]
+
+    @staticmethod
+    def key(text, voice, rate):
+        return hashlib.sha256(f"{voice}\n{rate}\n{text}".encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".mp3")
+
+    # 读取缓存，命中时刷新其使用时间
+    def get(self, key):
+        path = self.path(key)
+        with self.lock:
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                os.utime(path)
+            except OSError:
+                return None
+        return data
+
+    # 写入缓存（先写临时文件再替换，避免中断留下残缺文件），随后按需淘汰
+    def put(self, key, data):
+        path = self.path(key)
+        with self.lock:
+            old = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+            self.size += len(data) - old
+            if self.size > self.max_bytes:
+                self.evict()
+
+    # 淘汰最久未使用的缓存，直到总大小回到上限以内
+    def evict(self):
+        files = sorted(self.files(), key=os.path.getmtime)
+        for path in files:
+            if self.size <= self.max_bytes:
+                break
+            self.size -= os.path.getsize(path)
+            os.remove(path)
+
+# 一条待播报的语音，合成在后台进行，播放完毕后 done 被置位
+class Utterance:
+    def __init__(self, text, id):
+        self.text = text
+        self.id = id
+        self.audio = None
+        self.done = threading.Event()
+
+    # 阻塞等待本条语音播放完毕
+    def wait(self, timeout = None):
+        return self.done.wait(timeout)
+
+# 设置语音播报类
+# 语音合成与播放流水线化：say 立即返回，合成在后台事件循环中提前进行，播放线程按顺序播放，当前语音播放时后续语音已在合成
+# 上帝(id 为 0)的语音写入磁盘缓存，cache 为 None 时不使用缓存；telemetry 记录合成与播放耗时
+class TextToSpeech:
+    def __init__(self, cache = None, telemetry = None):
+        # 重设玩家音色和相关语速加快
+        self.ids = [6, 3, 4, 5, 7, 8, 9, 10, 11, 13]
+        self.rate = ["+20%", "+45%", "+45%", "+45%", "+45%", "+45%", "+50%", "+50%", "+50%", "+60%"]
+        self.cache = cache
+        self.telemetry = telemetry or Telemetry()
+        # 常驻后台事件循环，所有语音合成共用，避免每次 asyncio.run 新建事件循环
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        # 首先执行语音获取，仅执行一次
+        asyncio.run_coroutine_threadsafe(self.get_voices(), self.loop).result()
+        # 播放队列，播放线程依次取出播放
+        self.queue = Queue()
+        threading.Thread(target=self.play_loop, daemon=True).start()
+
+    async def get_voices(self):
+        # 获取全部中文语音，同时保存到缓存目录，离线时从缓存读取
+        voices_file = os.path.join(self.cache.directory, "voices.json") if self.cache else None
+        try:
+            self.voices = await VoicesManager.create()
+            self.chinese_voices = self.voices.find(Language="zh")
+        except Exception:
+            if not voices_file or not os.path.exists(voices_file):
+                raise
+            print("语音列表获取失败，使用缓存的语音列表")
+            with open(voices_file, encoding="utf-8") as f:
+                self.chinese_voices = json.load(f)
+            return
+        if voices_file:
+            with open(voices_file, "w", encoding="utf-8") as f:
+                json.dump(self.chinese_voices, f, ensure_ascii=False)
+
+    # 玩家编号对应的音色位置，玩家多于音色时循环使用
+    def slot(self, id):
+        return 0 if id == 0 else (id - 1) % (len(self.ids) - 1) + 1
+
+    async def synthesize(self, text, id = 0, timeout = 30):
+        with self.telemetry.span("tts_synthesize", id=id, chars=len(text)) as span:
+            audio = await self.synthesize_audio(text, id, timeout, span)
+            span["bytes"] = len(audio) if audio else 0
+            return audio
+
+    async def synthesize_audio(self, text, id, timeout, span):
+        # 根据 id 选用不同音色播报，默认为0，即上帝。
+        voice = self.chinese_voices[self.ids[self.slot(id)]]["ShortName"]
+        # 上帝语音优先读取磁盘缓存
+        key = None
+        if self.cache and id == 0:
+            key = AudioCache.key(text, voice, self.rate[self.slot(id)])
+            audio = self.cache.get(key)
+            if audio:
+                span["kind"] = "cache"
+                return audio
+        span["kind"] = "edge_tts"
+        # 创建Communicate对象并获取音频流
+        communicate = Communicate(text, voice=voice, rate = self.rate[self.slot(id)])
+        # 将音频数据存入内存（不保存为文件）
+        audio_stream = io.BytesIO()
+        try:
+            # 封装 async for 循环成一个可等待的协程
+            async def collect_audio():
+                async for chunk in communicate.stream():
+                    if chunk["type"] == "audio":
+                        audio_stream.write(chunk["data"])
+
+            # 使用 asyncio.wait_for 限制总时间
+            await asyncio.wait_for(collect_audio(), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"语音生成超过 {timeout} 秒，已终止")
+            return None
+        except Exception as e:
+            print(f"语音生成出错: {e}")
+            return None
+        audio = audio_stream.getvalue()
+        if key and audio:
+            self.cache.put(key, audio)
+        return audio
+
+    # 预热缓存：提前合成全部固定的上帝播报（不播放），返回可等待的 Future
+    def prewarm(self, lines, concurrency = 4):
+        async def warm_all():
+            semaphore = asyncio.Semaphore(concurrency)
+            async def warm(text):
+                async with semaphore:
+                    await self.synthesize(text)
+            await asyncio.gather(*(warm(text) for text in lines))
+        return asyncio.run_coroutine_threadsafe(warm_all(), self.loop)
+
+    # 加入播报队列并立即返回，合成马上在后台开始
+    def say(self, text, id = 0):
+        utterance = Utterance(text, id)
+        utterance.audio = asyncio.run_coroutine_threadsafe(self.synthesize(text, id), self.loop)
+        self.queue.put(utterance)
+        return utterance
+
+    # 等待队列中全部语音播放完毕
+    def wait(self):
+        self.queue.join()
+
+    # 播放线程，按加入顺序依次播放
+    def play_loop(self):
+        while True:
+            utterance = self.queue.get()
+            try:
+                audio = utterance.audio.result()
+                if audio:
+                    self.play(audio)
+            except Exception as e:
+                print(f"语音播放出错: {e}")
+            finally:
+                utterance.done.set()
+                self.queue.task_done()
+
+    def play(self, audio):
+        # 于内存中直接解码播放
+        sound = pygame.mixer.Sound(file=io.BytesIO(audio))
+        with self.telemetry.span("tts_play", seconds=sound.get_length()):
+            channel = sound.play()
+            if channel is None:
+                return
+            # 按音频时长等待播放结束，不再轮询 get_busy
+            time.sleep(sound.get_length())
+
+# 离线预热上帝语音缓存
+if __name__ == "__main__":
+    from engine import narrator_lines
+    parser = argparse.ArgumentParser(description="预先合成全部上帝播报并写入语音缓存")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="语音缓存目录")
+    parser.add_argument("--players", type=int, default=9, help="玩家人数，预热1号至该编号的播报变体")
+    args = parser.parse_args()
+
+    pygame.mixer.init()
+    lines = narrator_lines(args.players)
+    voice = TextToSpeech(cache = AudioCache(args.cache_dir))
+    voice.prewarm(lines).result()
+    print(f"已缓存 {len(lines)} 条上帝播报，缓存大小 {voice.cache.size / 1024 / 1024:.1f} MB")
@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# 作为 Prometheus 标签的属性
+LABELS = ("model", "provider", "phase", "kind")
+# 耗时直方图的分桶（秒）
+BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 30, 60, 120)
+
+# 结构化追踪与指标
+# 每个 span 记录开始、结束时间和属性（模型、玩家编号、身份、令牌数、重试次数等），逐行写入 JSONL 追踪文件
+# 同时按 名称+标签 累计耗时直方图、令牌数和计数，定期写入 Prometheus 文本格式的指标文件
+# 两个路径都为 None 时不记录任何内容
+class Telemetry:
+    def __init__(self, trace_path = None, metrics_path = None, interval = 10):
+        self.trace_path = trace_path
+        self.metrics_path = metrics_path
+        self.interval = interval
+        self.enabled = bool(trace_path or metrics_path)
+        self.lock = threading.Lock()
+        self.trace = open(trace_path, "a", encoding="utf-8") if trace_path else None
+        # {(名称, 标签): {"count", "sum", "buckets"}}，{(指标, 标签): 数值}
+        self.spans = {}
+        self.counters = {}
+        self.stopped = threading.Event()
+        if metrics_path:
+            threading.Thread(target=self.write_loop, daemon=True).start()
+
+    # 记录一个 span，with 语句中可更新属性；出错时记录异常类型后继续抛出
+    @contextmanager
+    def span(self, name, **attrs):
+        start = time.time()
+        begin = time.perf_counter()
+        try:
+            yield attrs
+        except Exception as e:
+            attrs["error"] = type(e).__name__
+            raise
+        finally:
+            self.finish(name, start, time.perf_counter() - begin, attrs)
+
+    def finish(self, name, start, duration, attrs):
+        if not self.enabled:
+            return
+        labels = tuple((key, str(attrs[key])) for key in LABELS if attrs.get(key) is not None)
+        with self.lock:
+            row = self.spans.setdefault((name, labels), {"count": 0, "sum": 0.0, "buckets": [0] * len(BUCKETS)})
+            row["count"] += 1
+            row["sum"] += duration
+            for i, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    row["buckets"][i] += 1
+            for key in ("prompt_tokens", "completion_tokens", "cached_tokens", "retries"):
+                if attrs.get(key):
+                    self.counters[(key, labels)] = self.counters.get((key, labels), 0) + attrs[key]
+            if attrs.get("error"):
+                self.counters[("errors", labels)] = self.counters.get(("errors", labels), 0) + 1
+            if self.trace:
+                self.trace.write(json.dumps({"name": name, "start": start, "end": start + duration, "duration": duration, **attrs}, ensure_ascii=False, default=str) + "\n")
+
+    # 计数，例如解析失败次数
+    def count(self, name, value = 1, **attrs):
+        if not self.enabled:
+            return
+        labels = tuple((key, str(attrs[key])) for key in LABELS if attrs.get(key) is not None)
+        with self.lock:
+            self.counters[(name, labels)] = self.counters.get((name, labels), 0) + value
+            if self.trace:
+                self.trace.write(json.dumps({"name": name, "time": time.time(), "value": value, **attrs}, ensure_ascii=False, default=str) + "\n")
+
+    # Prometheus 文本格式
+    def metrics(self):
+        def label_text(labels, extra = ()):
+            items = [f'{key}="{value}"' for key, value in tuple(labels) + tuple(extra)]
+            return "{" + ",".join(items) + "}" if items else ""
+        lines = []
+        with self.lock:
+            for metric in sorted({name for name, _ in self.spans}):
+                lines.append(f"# TYPE werewolf_{metric}_seconds histogram")
+                for (name, labels), row in sorted(self.spans.items()):
+                    if name != metric:
+                        continue
+                    for bound, value in zip(BUCKETS, row["buckets"]):
+                        lines.append(f"werewolf_{metric}_seconds_bucket{label_text(labels, [('le', bound)])} {value}")
+                    lines.append(f"werewolf_{metric}_seconds_bucket{label_text(labels, [('le', '+Inf')])} {row['count']}")
+                    lines.append(f"werewolf_{metric}_seconds_sum{label_text(labels)} {row['sum']:.6f}")
+                    lines.append(f"werewolf_{metric}_seconds_count{label_text(labels)} {row['count']}")
+            for metric in sorted({name for name, _ in self.counters}):
+                lines.append(f"# TYPE werewolf_{metric}_total counter")
+                for (name, labels), value in sorted(self.counters.items()):
+                    if name == metric:
+                        lines.append(f"werewolf_{metric}_total{label_text(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    # 写入指标文件（先写临时文件再替换）并刷新追踪文件
+    def flush(self):
+        if self.trace:
+            with self.lock:
+                self.trace.flush()
+        if self.metrics_path:
+            text = self.metrics()
+            with open(self.metrics_path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(self.metrics_path + ".tmp", self.metrics_path)
+
+    def write_loop(self):
+        while not self.stopped.wait(self.interval):
+            self.flush()
+
+    def close(self):
+        self.stopped.set()
+        self.flush()
+        if self.trace:
+            self.trace.close()
+            self.trace = None
@@ -0,0 +1,141 @@
+import os
+import json
+import argparse
+from datetime import datetime
+from multiprocessing.util import Finalize
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from agents import configure_clients, close_clients
+from providers import configure_providers
+from engine import WerewolfEngine, EXAMPLE_AGENTS, ROLES, BOARDS, with_base_url, seat_agents
+from results import ResultStore
+
+# 座位与身份轮换安排
+# 板子共 n 个身份，第 g 局中第 i 个座位的身份为 roles[(i + g) % n]，每连续 n 局每位大模型恰好把每个身份位各玩一次（9人板子为3次狼人、3次平民、预女猎各1次）
+# 每完成一轮 n 局，座位整体后移一位，使大模型在不同发言位置轮换
+def schedule(games, roles=ROLES):
+    n = len(roles)
+    jobs = []
+    for g in range(games):
+        shift = g // n
+        seating = [(i + shift) % n for i in range(n)]
+        jobs.append({
+            "game": g + 1,
+            "seating": seating,
+            "roles": [roles[(i + g) % n] for i in range(n)]
+        })
+    return jobs
+
+# 在子进程中进行一局游戏，返回每位大模型的身份和得分
+# 指定 checkpoint_dir 时每个阶段结束后保存断点，重新运行时已完成的对局直接读取结果，未完成的对局从断点继续
+def play_match(job, agents=None, max_workers=1, checkpoint_dir=None, log_dir=None):
+    agents = seat_agents(agents or EXAMPLE_AGENTS, len(job["roles"]))
+    seated = [agents[i] for i in job["seating"]]
+    checkpoint = None
+    if checkpoint_dir:
+        done = os.path.join(checkpoint_dir, f"game-{job['game']}.result.json")
+        if os.path.exists(done):
+            with open(done, encoding="utf-8") as f:
+                return json.load(f)
+        checkpoint = os.path.join(checkpoint_dir, f"game-{job['game']}.json")
+
+    # 每局单独一个游戏日志文件，多个进程不会写入同一文件
+    log = os.path.join(log_dir, f"game-{job['game']}.jsonl") if log_dir else None
+    # 没有断点，或断点保存于本局结束之后（结果尚未写入）时，重新进行本局
+    engine = WerewolfEngine(matchs=1, agents=seated, max_workers=max_workers, checkpoint=checkpoint, log=log, board=job["roles"])
+    if not (engine.load_checkpoint() and engine.in_game):
+        engine.start_game(roles=job["roles"])
+    engine.play_game()
+    engine.log.close()
+    # 得分取本局结果中的本局得分（重新进行本局时引擎的累计积分包含断点中上一次的积分）
+    record = engine.match_record()
+    result = {
+        "game": job["game"],
+        "winner": engine.winner,
+        "players": [{key: one[key] for key in ("name", "role", "point", "mvp", "lvp")} for one in record["players"]],
+        # 完整的本局结果，由主进程写入结果库
+        "record": record
+    }
+    # 记录本局结果，之后不再需要断点
+    if checkpoint_dir:
+        with open(done + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        os.replace(done + ".tmp", done)
+        os.remove(checkpoint)
+    return result
+
+# 合并各局积分，得到积分榜
+def merge(results):
+    board = {}
+    for result in sorted(results, key=lambda x: x["game"]):
+        for one in result["players"]:
+            row = board.setdefault(one["name"], {"name": one["name"], "point": 0, "games": 0, "mvp": 0, "lvp": 0, "roles": {}})
+            row["point"] += one["point"]
+            row["games"] += 1
+            row["mvp"] += one["mvp"]
+            row["lvp"] += one["lvp"]
+            row["roles"][one["role"]] = row["roles"].get(one["role"], 0) + 1
+    return sorted(board.values(), key=lambda x: x["point"], reverse=True)
+
+# 子进程初始化：设置客户端，并按进程数平分各服务商的请求速率，全部进程合计不超过服务商的限额
+# 客户端在子进程的全部对局间复用，子进程退出时关闭（子进程不执行 atexit，由 multiprocessing 的退出清理调用）
+def init_worker(client_settings, share):
+    configure_clients(**(client_settings or {}))
+    configure_providers(share)
+    Finalize(None, close_clients, exitpriority=10)
+
+# 多进程并行进行全部比赛
+# 每个子进程中共享的大模型客户端在其进行的全部对局间复用，client_settings 为子进程的客户端设置（连接池大小、超时）
+# results 为结果库路径，全部比赛结束后由主进程按局数顺序写入（SQLite 只有一个写入者）；使用断点目录时以目录标识本次锦标赛，重新运行不会重复写入
+# log_dir 为游戏日志目录，每局写入 game-<局数>.jsonl；board 为板子（身份组成）
+def run_tournament(games, processes=None, agents=None, max_workers=1, checkpoint_dir=None, client_settings=None, results=None, log_dir=None, board=None):
+    results_store = ResultStore(results) if results else None
+    source = os.path.abspath(checkpoint_dir) if checkpoint_dir else f"tournament-{datetime.now().isoformat(timespec='seconds')}"
+    results = []
+    failed = []
+    if checkpoint_dir:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+    processes = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=processes, initializer=init_worker, initargs=(client_settings, 1 / processes)) as pool:
+        futures = {pool.submit(play_match, job, agents, max_workers, checkpoint_dir, log_dir): job for job in schedule(games, board or ROLES)}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # 单局出错不影响其余比赛
+                print(f"第 {job['game']} 局出错: {e}", flush=True)
+                failed.append(job["game"])
+                continue
+            results.append(result)
+            print(f"第 {result['game']} 局结束，{result['winner']}阵营获胜（已完成 {len(results)} / {games} 局）", flush=True)
+    # 等级分与写入顺序有关，全部比赛结束后按局数顺序写入，同一锦标赛重新运行时等级分不变
+    if results_store:
+        for result in sorted(results, key=lambda x: x["game"]):
+            if result.get("record"):
+                results_store.record({**result["record"], "source": source, "game": result["game"]})
+        results_store.close()
+    return merge(results), failed
+
+# 锦标赛入口
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI狼人杀锦标赛（多进程并行）")
+    parser.add_argument("-n", "--games", type=int, default=9, help="比赛总局数，取板子人数的倍数时身份完全均衡")
+    parser.add_argument("-p", "--processes", type=int, default=None, help="并行进程数，默认为CPU核心数")
+    parser.add_argument("-w", "--workers", type=int, default=9, help="每局内的并发决策数")
+    parser.add_argument("--checkpoint-dir", default=None, help="断点目录，中断后使用相同参数重新运行即可跳过已完成的对局并从断点继续")
+    parser.add_argument("--base-url", default=None, help="全部大模型改用该服务地址，例如本地模拟服务 http://127.0.0.1:8000/v1")
+    parser.add_argument("--pool-size", type=int, default=None, help="每个服务商客户端的最大连接数")
+    parser.add_argument("--timeout", type=float, default=None, help="大模型请求超时秒数")
+    parser.add_argument("--results", default=None, help="结果库路径（SQLite），每局结束后写入结果并更新等级分")
+    parser.add_argument("--log-dir", default=None, help="游戏日志目录，每局写入一个 JSONL 文件")
+    parser.add_argument("--board", default="9人预女猎", choices=list(BOARDS), help="板子（身份组成）")
+    args = parser.parse_args()
+
+    agents = with_base_url(EXAMPLE_AGENTS, args.base_url) if args.base_url else None
+    board, failed = run_tournament(args.games, args.processes, agents=agents, max_workers=args.workers, checkpoint_dir=args.checkpoint_dir, client_settings={"max_connections": args.pool_size, "timeout": args.timeout}, results=args.results, log_dir=args.log_dir, board=BOARDS[args.board])
+    # 积分一览
+    for one in board:
+        roles = "，".join(f"{role}{count}" for role, count in sorted(one["roles"].items()))
+        print(f"{one['name']} : {one['point']}分  {one['games']}局  MVP {one['mvp']}次  战犯 {one['lvp']}次  ({roles})")
+    if failed:
+        print(f"出错的对局: {', '.join(map(str, sorted(failed)))}")